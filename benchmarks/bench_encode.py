@@ -0,0 +1,75 @@
+"""Cost of building and encoding geoCOM requests.
+
+Compares the TachyRequest -> GeoCOMCommand path, which builds two QObjects
+and formats the whole message per send, with TachyRequest.geocom_command,
+which encodes the arguments behind a prefix computed once per class.
+Both are timed on their own and through a MessageQueue writing to a null
+port, answered right away so the window never fills.
+
+Run from the repository root:
+    python benchmarks/bench_encode.py [sends]
+"""
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from PyQt5.QtCore import QCoreApplication
+
+from tachyconnect.ts_control import MessageQueue, GeoCOMReply
+from tachyconnect.TachyRequest import TMC_GetSimpleMea
+from bench_transaction_ids import NullSerial
+
+N_SENDS = 100000
+ARGS = ["1000", "1"]
+
+
+def legacy(transaction_id):
+    command = TMC_GetSimpleMea(args=ARGS).get_geocom_command()
+    command.set_transaction_id(transaction_id)
+    return command
+
+
+def template(transaction_id):
+    command = TMC_GetSimpleMea.geocom_command(*ARGS)
+    command.set_transaction_id(transaction_id)
+    return command
+
+
+def bench_encode(make, n_sends):
+    start = perf_counter()
+    for i in range(n_sends):
+        make(i % 7 + 1).bytes
+    return n_sends / (perf_counter() - start)
+
+
+def bench_queue(make, n_sends):
+    queue = MessageQueue(7)
+    queue.set_serial(NullSerial())
+    replies = {i: GeoCOMReply(f"%R1P,0,{i}:0,1.0,1.5,12.3\r\n".encode("ascii")) for i in range(1, 8)}
+    start = perf_counter()
+    for _ in range(n_sends):
+        transaction_id = queue.append(make(0))
+        queue.register_reply(replies[transaction_id])
+    elapsed = perf_counter() - start
+    queue.close()
+    return n_sends / elapsed
+
+
+def main(n_sends=N_SENDS):
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    assert legacy(3).bytes == template(3).bytes
+    results = []
+    print(f"{'path':>10} {'encode sends/s':>15} {'queue sends/s':>14}")
+    for name, make in (("legacy", legacy), ("template", template)):
+        encode_rate = bench_encode(make, n_sends)
+        queue_rate = bench_queue(make, n_sends)
+        results.append({"path": name, "sends": n_sends, "encode_sends_per_s": encode_rate,
+                        "queue_sends_per_s": queue_rate})
+        print(f"{name:>10} {encode_rate:>15.0f} {queue_rate:>14.0f}")
+    return results
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else N_SENDS)
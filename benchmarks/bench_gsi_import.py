@@ -0,0 +1,66 @@
+"""Streaming import of large GSI job files.
+
+Writes synthetic GSI-16 jobs of growing size to a temporary directory and
+imports them with GSI_Parser.iter_file. Reports throughput in lines/s and
+the peak memory traced during the import, which should not grow with the
+size of the job.
+
+Run from the repository root:
+    python benchmarks/bench_gsi_import.py [lines ...]
+"""
+import os
+import sys
+import tempfile
+import tracemalloc
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tachyconnect import GSI_Parser
+
+SIZES = [20000, 100000, 400000]
+
+
+def gsi16_block(i):
+    return (f"*11....+{i:016d} 21.022+{(i * 37) % 40000000:016d} 22.022+{10859950 + i % 1000:016d} "
+            f"31..00+{609 + i % 100:016d} 81..00+{565385748 + i:016d} 82..00-{5924615105 + i:016d} "
+            f"83..00+{5224 + i % 1000:016d} 87..10+{0:016d} \r\n")
+
+
+def write_job(path, n_lines):
+    with open(path, "w", encoding="ascii", newline="") as job:
+        for i in range(n_lines):
+            job.write(gsi16_block(i))
+
+
+def import_job(path, batch_size=None):
+    n_lines = 0
+    for record in GSI_Parser.iter_file(path, batch_size=batch_size):
+        n_lines += len(record) if batch_size else 1
+    return n_lines
+
+
+def main(sizes=SIZES):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_lines in sizes:
+            path = os.path.join(tmp, f"job_{n_lines}.gsi")
+            write_job(path, n_lines)
+            start = perf_counter()
+            imported = import_job(path)
+            elapsed = perf_counter() - start
+            tracemalloc.start()
+            import_job(path, batch_size=1000)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results.append({"lines": imported,
+                            "file_bytes": os.path.getsize(path),
+                            "lines_per_s": imported / elapsed,
+                            "peak_bytes": peak})
+            print(f"{imported:>8} lines, {os.path.getsize(path) / 2**20:>7.1f} MiB: "
+                  f"{imported / elapsed:>9.0f} lines/s, peak {peak / 2**20:.1f} MiB")
+    return results
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or SIZES)
@@ -0,0 +1,43 @@
+"""Memory needed to keep a whole survey job in memory.
+
+Parses the same synthetic GSI-16 job into parse()'s dict pairs and into
+GSIBlocks and reports the traced bytes per block for both.
+
+Run from the repository root:
+    python benchmarks/bench_gsi_memory.py [lines]
+"""
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tachyconnect import GSI_Parser
+from bench_gsi_import import gsi16_block
+
+N_LINES = 50000
+
+
+def traced_size(parser, lines):
+    gc.collect()
+    tracemalloc.start()
+    records = [parser(line) for line in lines]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return size
+
+
+def main(n_lines=N_LINES):
+    lines = [gsi16_block(i) for i in range(n_lines)]
+    results = []
+    for name, parser in (("dict pairs", GSI_Parser.parse), ("GSIBlock", GSI_Parser.parse_block)):
+        size = traced_size(parser, lines)
+        results.append({"records": name, "blocks": n_lines, "bytes_per_block": size / n_lines})
+        print(f"{name:>10}: {size / n_lines:>7.0f} bytes per block")
+    return results
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else N_LINES)
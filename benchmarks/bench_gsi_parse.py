@@ -0,0 +1,90 @@
+"""GSI_Parser.parse against the previous parser.
+
+legacy_parse is the parser as it was before parse() looked words up by
+their cached header: five dict lookups per word and ValueError as flow
+control. Both run over the sample lines of GSI_Parser's __main__ block,
+repeated to the given number of lines, the best of REPEAT runs counts.
+
+Run from the repository root:
+    python benchmarks/bench_gsi_parse.py [lines]
+"""
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tachyconnect import GSI_Parser
+from tachyconnect.GSI_Parser import (dict_labels, dict_formats, dict_units_attributes_digits,
+                                     dict_typeConversions, dict_units_dividers)
+
+SAMPLE_LINES = [
+    '*11....+0000000000000473 21.022+0000000039809400 22.022+0000000010859950 31..00+0000000000000609 '
+    '81..00+0000000565385748 82..00+0000005924615105 83..00+0000000000005224 87..10+0000000000000000 \r\n',
+    "*88..10+0000000000000000",
+    "*13....+0000000000TCR405",
+]
+N_LINES = 300000
+REPEAT = 5
+
+
+def legacy_parse(line):
+    extracted = {}
+    units = {}
+    if len(line) <= 4:
+        return extracted, units
+    if line[0] == "*":
+        precision = 16
+        line = line[1:]
+    else:
+        precision = 8
+    extracted['precision'] = precision
+    for part in line.split():
+        identifier = part[:2]
+        idExtension = part[2]
+        compensatorInfo = part[3]
+        sourceInfo = part[4]
+        unitInfo = part[5]
+        signInfo = part[6]
+        value = part[7:]
+        label = dict_labels[identifier]
+        baseType = dict_formats[identifier]
+        units[label] = dict_units_attributes_digits[unitInfo]
+        try:
+            if not baseType == "TEXT":
+                value = dict_typeConversions[baseType](value)
+                if not baseType == "DATE":
+                    if not signInfo == "+":
+                        value *= -1
+                    value /= dict_units_dividers[unitInfo]
+            extracted[label] = value
+        except ValueError:
+            pass
+    return extracted, units
+
+
+def run(parser, lines):
+    best = None
+    for _ in range(REPEAT):
+        start = perf_counter()
+        for line in lines:
+            parser(line)
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(n_lines=N_LINES):
+    for line in SAMPLE_LINES:
+        assert GSI_Parser.parse(line) == legacy_parse(line), line
+    lines = (SAMPLE_LINES * (n_lines // len(SAMPLE_LINES) + 1))[:n_lines]
+    results = []
+    for name, parser in (("legacy", legacy_parse), ("parse", GSI_Parser.parse)):
+        elapsed = run(parser, lines)
+        results.append({"parser": name, "lines": n_lines, "lines_per_s": n_lines / elapsed})
+        print(f"{name:>9}: {n_lines / elapsed:>10.0f} lines/s")
+    return results
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else N_LINES)
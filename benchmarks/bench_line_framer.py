@@ -0,0 +1,69 @@
+"""Read path throughput for an instrument dumping GSI blocks.
+
+Compares the LineFramer (one buffer, memoryview slices, one decode per
+line) with the previous path that called readLine() per line and built
+the reply twice. A QBuffer stands in for the serial port.
+
+Run from the repository root:
+    python benchmarks/bench_line_framer.py
+"""
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from PyQt5.QtCore import QBuffer, QByteArray, QIODevice
+
+from tachyconnect.ts_control import LineFramer, TachyReply, GSIReply
+
+GSI_BLOCK = (b"*11....+0000000000000473 21.022+0000000039809400 22.022+0000000010859950 "
+             b"31..00+0000000000000609 81..00+0000000565385748 82..00+0000005924615105 "
+             b"83..00+0000000000005224 87..10+0000000000000000 \r\n")
+N_LINES = 20000
+READ_SIZE = 4096  # bytes per readyRead, roughly what a USB serial adapter delivers
+
+
+def open_device(data):
+    device = QBuffer()
+    device.setData(QByteArray(data))
+    device.open(QIODevice.ReadOnly)
+    return device
+
+
+def legacy(data):
+    device = open_device(data)
+    replies = 0
+    while device.canReadLine():
+        reply = TachyReply(device.readLine())
+        GSIReply(reply.bites)
+        replies += 1
+    return replies
+
+
+def framed(data):
+    device = open_device(data)
+    framer = LineFramer()
+    replies = 0
+    while not device.atEnd():
+        framer.feed(device.read(READ_SIZE))
+        for line in framer.frames():
+            TachyReply.from_line(line)
+            replies += 1
+    return replies
+
+
+def main():
+    data = GSI_BLOCK * N_LINES
+    results = []
+    for name, reader in (("readLine", legacy), ("LineFramer", framed)):
+        start = perf_counter()
+        n_replies = reader(data)
+        elapsed = perf_counter() - start
+        results.append({"reader": name, "lines": n_replies, "lines_per_s": n_replies / elapsed})
+        print(f"{name:>12}: {n_replies / elapsed:>10.0f} lines/s")
+    return results
+
+
+if __name__ == "__main__":
+    main()
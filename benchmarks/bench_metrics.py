@@ -0,0 +1,65 @@
+"""Cost of the MessageQueue instrumentation per request.
+
+Times append/register_reply rounds of a templated TMC_QuickDist request on
+a queue without metrics and on one recording into a Metrics instance, and
+the recording of a single latency into a LatencyHistogram.
+
+Run from the repository root:
+    python benchmarks/bench_metrics.py [rounds]
+"""
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from PyQt5.QtCore import QCoreApplication
+
+from tachyconnect.ts_control import MessageQueue, GeoCOMReply
+from tachyconnect.Metrics import Metrics, LatencyHistogram
+from tachyconnect.TachyRequest import TMC_QuickDist
+
+from bench_transaction_ids import NullSerial
+
+ROUNDS = 100000
+
+
+def bench_queue(metrics, rounds):
+    queue = MessageQueue(7)
+    queue.metrics = metrics
+    queue.set_serial(NullSerial())
+    replies = {i: GeoCOMReply(f"%R1P,0,{i}:0,1.2,1.5,12.3\r\n".encode("ascii")) for i in range(1, 8)}
+    template = TMC_QuickDist.template()
+    start = perf_counter()
+    for _ in range(rounds):
+        transaction_id = queue.append(template.request())
+        queue.register_reply(replies[transaction_id])
+    elapsed = perf_counter() - start
+    queue.close()
+    return elapsed / rounds
+
+
+def bench_histogram(rounds):
+    histogram = LatencyHistogram()
+    latencies = [i * 1e-5 for i in range(1000)]
+    start = perf_counter()
+    for i in range(rounds):
+        histogram.record(latencies[i % 1000])
+    return (perf_counter() - start) / rounds
+
+
+def main(rounds=ROUNDS):
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    results = []
+    for case, metrics in (("queue without metrics", None), ("queue with metrics", Metrics())):
+        cost = bench_queue(metrics, rounds)
+        results.append({"case": case, "rounds": rounds, "s_per_request": cost})
+        print(f"{case:>22}: {cost * 1e6:6.2f} us per request")
+    cost = bench_histogram(rounds)
+    results.append({"case": "histogram record", "rounds": rounds, "s_per_request": cost})
+    print(f"{'histogram record':>22}: {cost * 1e6:6.2f} us per value")
+    return results
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else ROUNDS)
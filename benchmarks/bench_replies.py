@@ -0,0 +1,53 @@
+"""Parsing cost of single replies as they come off the serial port.
+
+Times TachyReply.from_line for geoCOM and GSI lines, GSIReply.get_result
+and the typed decoding of geoCOM replies with TachyRequest.decode.
+
+Run from the repository root:
+    python benchmarks/bench_replies.py [replies]
+"""
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from tachyconnect.ts_control import TachyReply
+from tachyconnect.TachyRequest import TMC_QuickDist, TMC_GetCoordinate
+
+N_REPLIES = 100000
+QUICK_DIST = b"%R1P,0,3:0,1.234567890123456,1.570796326794897,12.345678901234567"
+COORDINATE = (b"%R1P,0,5:0,100.123456789012345,200.123456789012345,10.123456789012345,123456,"
+              b"100.123456789012345,200.123456789012345,10.123456789012345,123457")
+GSI_BLOCK = (b"*11....+0000000000000473 21.022+0000000039809400 22.022+0000000010859950 "
+             b"31..00+0000000000000609 81..00+0000000565385748 82..00+0000005924615105 "
+             b"83..00+0000000000005224 87..10+0000000000000000 ")
+
+
+def rate(function, n_replies):
+    start = perf_counter()
+    for _ in range(n_replies):
+        function()
+    return n_replies / (perf_counter() - start)
+
+
+def main(n_replies=N_REPLIES):
+    quick_dist = TachyReply.from_line(QUICK_DIST)
+    coordinate = TachyReply.from_line(COORDINATE)
+    cases = [
+        ("geocom from_line", lambda: TachyReply.from_line(QUICK_DIST)),
+        ("gsi from_line", lambda: TachyReply.from_line(GSI_BLOCK)),
+        ("gsi get_result", lambda: TachyReply.from_line(GSI_BLOCK).get_result()),
+        ("TMC_QuickDist.decode", lambda: TMC_QuickDist.decode(quick_dist)),
+        ("TMC_GetCoordinate.decode", lambda: TMC_GetCoordinate.decode(coordinate)),
+    ]
+    results = []
+    for name, function in cases:
+        replies_per_s = rate(function, n_replies)
+        results.append({"case": name, "replies": n_replies, "replies_per_s": replies_per_s})
+        print(f"{name:>25}: {replies_per_s:>10.0f} replies/s")
+    return results
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else N_REPLIES)
@@ -0,0 +1,82 @@
+"""End-to-end request round trips through a Dispatcher.
+
+A SimulatedTotalStation stands in for the instrument, attached in process
+as a SimulatedPort or served on a pseudo terminal and opened as a real
+QSerialPort. Reports the mean round trip of single requests against an
+instrument taking LATENCY per request, and the throughput of the stack
+with the whole transaction id window in flight and no instrument delay.
+
+Run from the repository root:
+    python benchmarks/bench_round_trip.py [requests]
+"""
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from PyQt5.QtCore import QCoreApplication
+
+from tachyconnect.ts_control import Dispatcher, MessageQueue, PendingReply
+from tachyconnect.ReplyHandler import ReplyHandler
+from tachyconnect.Simulator import SimulatedTotalStation, SimulatedPort, PtyServer
+from tachyconnect.TachyRequest import TMC_QuickDist
+
+N_REQUESTS = 1000  # at most MessageQueue.max_pending are queued at once
+LATENCY = 0.001  # s the simulated instrument takes per request
+
+
+class QuietHandler(ReplyHandler):
+    def handle(self, request, reply):
+        return True
+
+
+def make_dispatcher(transport):
+    dispatcher = Dispatcher(MessageQueue(1), MessageQueue(7), QuietHandler(), event_driven=True)
+    station = SimulatedTotalStation(latency=LATENCY)
+    server = None
+    if transport == "pty":
+        server = PtyServer(station)
+        dispatcher.open_port(server.port_name)
+    else:
+        dispatcher.attach(SimulatedPort(station))
+    dispatcher.listen()
+    return dispatcher, station, server
+
+
+def sequential(dispatcher, n_requests):
+    start = perf_counter()
+    for _ in range(n_requests):
+        dispatcher.send(TMC_QuickDist.geocom_command()).wait(5)
+    return (perf_counter() - start) / n_requests
+
+
+def pipelined(dispatcher, n_requests):
+    start = perf_counter()
+    pending_replies = [dispatcher.send(TMC_QuickDist.geocom_command()) for _ in range(n_requests)]
+    PendingReply.gather(*pending_replies).wait(n_requests)
+    return n_requests / (perf_counter() - start)
+
+
+def main(n_requests=N_REQUESTS):
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    results = []
+    for transport in ("in process", "pty"):
+        dispatcher, station, server = make_dispatcher(transport)
+        round_trip = sequential(dispatcher, n_requests // 5)
+        station.latency = 0
+        requests_per_s = pipelined(dispatcher, n_requests)
+        dispatcher.stop()
+        if server is not None:
+            dispatcher.serial.close()
+            server.stop()
+        results.append({"transport": transport, "instrument_latency_s": LATENCY, "requests": n_requests,
+                        "round_trip_s": round_trip, "overhead_s": round_trip - LATENCY,
+                        "pipelined_requests_per_s": requests_per_s})
+        print(f"{transport:>10}: {round_trip * 1000:6.2f} ms per round trip, "
+              f"{requests_per_s:8.0f} requests/s pipelined")
+    return results
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else N_REQUESTS)
@@ -0,0 +1,80 @@
+"""Per-send cost of MessageQueue transaction id allocation.
+
+Keeps the queue one request short of a full window and measures one
+append/register_reply round per iteration, so every send has to find the
+last free id. The old linear scan over all ids is timed for comparison.
+
+Run from the repository root:
+    python benchmarks/bench_transaction_ids.py
+"""
+import os
+import sys
+from time import perf_counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from PyQt5.QtCore import QCoreApplication, QByteArray
+
+from tachyconnect.ts_control import MessageQueue, GeoCOMCommand, GeoCOMReply
+
+WINDOWS = [7, 64, 1024, 16384, 65535]
+ROUNDS = 20000
+
+
+class NullSerial:
+    def write(self, data):
+        return len(data)
+
+    def close(self):
+        pass
+
+
+def linear_scan(indices, slots):
+    for i in indices:
+        if i not in slots.keys():
+            return i
+    return False
+
+
+def bench_queue(n_slots, rounds=ROUNDS):
+    queue = MessageQueue(n_slots)
+    queue.set_serial(NullSerial())
+    for _ in range(n_slots - 1):
+        queue.append(GeoCOMCommand("0", "COM_NullProc"))
+    command = GeoCOMCommand("0", "COM_NullProc")
+    replies = {i: GeoCOMReply(QByteArray(f"%R1P,0,{i}:0\r\n".encode("ascii"))) for i in range(1, n_slots + 1)}
+    start = perf_counter()
+    for _ in range(rounds):
+        transaction_id = queue.append(command)
+        queue.register_reply(replies[transaction_id])
+    elapsed = perf_counter() - start
+    queue.close()
+    return elapsed / rounds
+
+
+def bench_linear_scan(n_slots, rounds=ROUNDS):
+    indices = list(range(1, n_slots + 1))
+    slots = {i: None for i in indices[:-1]}
+    rounds = min(rounds, max(50, 2000000 // n_slots))
+    start = perf_counter()
+    for _ in range(rounds):
+        slot = linear_scan(indices, slots)
+        slots[slot] = None
+        del slots[slot]
+    return (perf_counter() - start) / rounds
+
+
+def main():
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+    print(f"{'window':>8} {'queue us/send':>14} {'scan us/send':>13}")
+    results = []
+    for n_slots in WINDOWS:
+        queue_cost = bench_queue(n_slots)
+        scan_cost = bench_linear_scan(n_slots)
+        results.append({"window": n_slots, "queue_s_per_send": queue_cost, "scan_s_per_send": scan_cost})
+        print(f"{n_slots:>8} {queue_cost * 1e6:>14.2f} {scan_cost * 1e6:>13.2f}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
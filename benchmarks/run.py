@@ -0,0 +1,94 @@
+"""Runs the benchmark suite and writes all results to one JSON file.
+
+Each benchmark module's main() returns a list of result dicts, they are
+collected per benchmark together with the package version, git revision
+and platform, so files of different releases can be compared directly.
+--quick runs smaller workloads for a fast check.
+
+Run from the repository root:
+    python benchmarks/run.py [--quick] [--output FILE] [benchmark ...]
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+from datetime import datetime, timezone
+from time import perf_counter
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(HERE, "..")
+
+# name: (module, arguments of a quick run)
+BENCHMARKS = {
+    "encode": ("bench_encode", {"n_sends": 20000}),
+    "replies": ("bench_replies", {"n_replies": 20000}),
+    "gsi_parse": ("bench_gsi_parse", {"n_lines": 50000}),
+    "gsi_import": ("bench_gsi_import", {"sizes": [20000]}),
+    "gsi_memory": ("bench_gsi_memory", {"n_lines": 10000}),
+    "line_framer": ("bench_line_framer", {}),
+    "transaction_ids": ("bench_transaction_ids", {}),
+    "metrics": ("bench_metrics", {"rounds": 20000}),
+    "round_trip": ("bench_round_trip", {"n_requests": 200}),
+}
+
+
+def package_version():
+    with open(os.path.join(ROOT, "setup.py"), encoding="utf-8") as setup:
+        match = re.search(r'version="([^"]+)"', setup.read())
+    return match.group(1) if match else None
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names, quick=False):
+    results = {}
+    for name in names:
+        module_name, quick_arguments = BENCHMARKS[name]
+        module = importlib.import_module(module_name)
+        print(f"## {name}")
+        start = perf_counter()
+        results[name] = {"results": module.main(**(quick_arguments if quick else {})),
+                         "seconds": perf_counter() - start}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the tachyconnect benchmarks.")
+    parser.add_argument("benchmarks", nargs="*", metavar="benchmark",
+                        help=f"any of {', '.join(BENCHMARKS)}, all by default")
+    parser.add_argument("--quick", action="store_true", help="smaller workloads")
+    parser.add_argument("--output", help="JSON file, default benchmarks/results/tachyconnect-<version>.json")
+    args = parser.parse_args()
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks {', '.join(unknown)}, choose from {', '.join(BENCHMARKS)}")
+
+    sys.path.insert(0, HERE)
+    version = package_version()
+    report = {"package": "tachyconnect",
+              "version": version,
+              "git_revision": git_revision(),
+              "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+              "python": platform.python_version(),
+              "platform": platform.platform(),
+              "quick": args.quick,
+              "benchmarks": run(args.benchmarks or list(BENCHMARKS), args.quick)}
+    output = args.output or os.path.join(HERE, "results", f"tachyconnect-{version}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as results_file:
+        json.dump(report, results_file, indent=1)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -27,5 +27,6 @@ setuptools.setup(
     },
     package_data={'tachyconnect': ['ui/*.py']},
     python_requires=">=3.8",
-    install_requires=["pyqt5"]
+    install_requires=["pyqt5"],
+    extras_require={"numpy": ["numpy"]}
 )
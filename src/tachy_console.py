@@ -1,6 +1,6 @@
 from ast import arg
 from enum import Enum
-import sys, json
+import sys, json, logging
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QFileDialog, QDialog, QLineEdit, QComboBox
 )
@@ -9,10 +9,15 @@ from matplotlib.pyplot import phase_spectrum
 from ui.main_window import Ui_MainWindow
 from tachyconnect.TachyJoystick import TachyJoystick
 from tachyconnect.ts_control import Dispatcher, MessageQueue, CommunicationConstants, GeoCOMCommand
+from tachyconnect.PortCache import PortCache
 from tachyconnect.ReplyHandler import ReplyHandler
+from tachyconnect.LogBuffer import LogBuffer
 from tachyconnect import TachyRequest, gc_constants
 from PyQt5.QtCore import Qt, QVariant
 
+LOG_LEVEL = logging.INFO  # DEBUG logs every request and reply of the reply handler as well
+log = logging.getLogger("tachy_console")
+
 
 class Window(QMainWindow, Ui_MainWindow):
     ready = pyqtSignal()
@@ -28,6 +33,10 @@ class Window(QMainWindow, Ui_MainWindow):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setupUi(self)
+        self.log_buffer = LogBuffer()
+        logging.getLogger().addHandler(self.log_buffer)
+        logging.getLogger().setLevel(LOG_LEVEL)
+        self.log_buffer.attach(self.log_viewer)
         
         self.reply_handler = ReplyHandler(fall_back=self.show_request_reply)
         self.reply_handler.register_command(TachyRequest.CSV_GetInstrumentName, self.identify)
@@ -35,7 +44,8 @@ class Window(QMainWindow, Ui_MainWindow):
 
         # for command in TachyRequest.ALL_COMMANDS:
         #     self.reply_handler.register_command(command, self.run_and_log)
-        self.dispatcher = Dispatcher(MessageQueue(1), MessageQueue(7), self.reply_handler)
+        self.dispatcher = Dispatcher(MessageQueue(1), MessageQueue(7), self.reply_handler, event_driven=True,
+                                     port_cache=PortCache(), auto_baud=True)
         
         self.dialect_selector.addItem(CommunicationConstants.GEOCOM)
         self.dialect_selector.addItem(CommunicationConstants.GSI)
@@ -88,6 +98,7 @@ class Window(QMainWindow, Ui_MainWindow):
         self.actionJoystick.triggered.connect(self.show_joystick)
         self.dispatcher.log.connect(self.log_append)
         self.dispatcher.non_requested_data.connect(self.surprise)
+        self.dispatcher.timed_out.connect(self.request_timed_out)
         self.reply_handler.caught_reply.connect(self.log_reply)
         
     def show_joystick(self):
@@ -97,8 +108,8 @@ class Window(QMainWindow, Ui_MainWindow):
         self.dispatcher.send(TachyRequest.CSV_GetInstrumentName().get_geocom_command())
     
     def identify(self, *results):
-        print(results)
-        if results[0] == str(gc_constants.GRC_OK):
+        log.debug("Identified: %s", results)
+        if results[0] == gc_constants.GRC_OK:
             device_name = results[-1]
             self.device_type = device_name
             self.log_append(f"Found {device_name}.")
@@ -113,7 +124,7 @@ class Window(QMainWindow, Ui_MainWindow):
         
     def run_and_log(self, *previous_results):
         if previous_results:
-            self.implementation_chart[self.last_command.__name__] = previous_results[0] != str(gc_constants.GRC_COM_PROC_UNAVAIL)
+            self.implementation_chart[self.last_command.__name__] = previous_results[0] != gc_constants.GRC_COM_PROC_UNAVAIL
             self.stringify(*previous_results)
         if self.test_list:
             command_class = self.test_list.pop()
@@ -140,12 +151,10 @@ class Window(QMainWindow, Ui_MainWindow):
         self.log_append(self.read_return_codes(True, *args))
 
     def log_append(self, text):
-        self.log_viewer.setPlainText(self.log_viewer.toPlainText() + "\n" + text)
-        scroll_bar = self.log_viewer.verticalScrollBar()
-        scroll_bar.setValue(scroll_bar.maximum())
+        log.info(text)
     
     def log_reply(self, reply):
-        self.log_append("Reply: " + str(reply))
+        log.info("Reply: %s", reply)
 
     def undict(self, d):
         self.log_append(str(d))
@@ -158,7 +167,6 @@ class Window(QMainWindow, Ui_MainWindow):
 
     def show_request_reply(self, message_and_reply):
         message, reply = message_and_reply[:2]
-        print(message, reply)
         request = message['message']
         results = reply.get_result()
         result_text = f"{gc_constants.MESSAGES[int(results.pop(0))]}{', '.join(results)}"
@@ -179,7 +187,10 @@ class Window(QMainWindow, Ui_MainWindow):
         self.log_append(f"Received: {reply}")
 
     def surprise(self, tadaa):
-        self.log_append("This came in unsolicited:\n" + tadaa)
+        log.warning("This came in unsolicited:\n%s", tadaa)
+
+    def request_timed_out(self, command):
+        log.warning("Timed out: %s after %s s", command.label, command.timeout)
 
     def toast(self):
         # beep = GeoCOMCommand(str(gc_constants.EDM_Laserpointer),"LAS",2,1)
@@ -196,12 +207,13 @@ class Window(QMainWindow, Ui_MainWindow):
             if isinstance(widget, QComboBox):
                 return str(widget.currentData())
         args = [get_arg_from_widget(widget) for widget in self.command_args_widget]
-        print("Args: ", ";".join(args))
+        log.debug("Args: %s", ";".join(args))
         # if self.dialect_selector.currentText() == CommunicationConstants.GSI:
         #     self.dispatcher.send(command(args = args).get_gsi_command())
         if self.dialect_selector.currentText() == CommunicationConstants.GEOCOM:
-            self.dispatcher.send(command(args = args).get_geocom_command())
-            print("Sent ascii: " + str(command(args = args).get_geocom_command()))
+            geocom_command = command(args = args).get_geocom_command()
+            self.dispatcher.send(geocom_command)
+            log.debug("Sent ascii: %s", geocom_command)
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -3,6 +3,7 @@
 #
 from PyQt5.QtCore import QThread, pyqtSignal, QTimer
 from PyQt5.QtSerialPort import QSerialPort
+from sys import intern
 
 dict_projections = {
     "WGS84": 4326,
@@ -288,6 +289,8 @@ dict_typeConversions = {
     }
 
 REPLY_ACK = '?'
+CHUNK_SIZE = 1 << 20  # bytes read at once when importing job files
+MAX_LINE_SIZE = 1 << 16  # bytes without a line break that are handed out as one line
 BEEP = 'BEEP/1\r\n'.encode('ascii')
 
 
@@ -323,35 +326,174 @@ class GSIPing(QThread):
         self.quit()
 
 
-class GSIMessage:
-    def __init__(self, wi, value):
-        pass
+class GSIWord:
+    """One word of a GSI block, e.g. '81..00+0000000565385748'.
 
+    Keeps the word index, the unit character and the converted value, which
+    is None if the data could not be converted."""
+    __slots__ = ('wi', 'unit', 'value')
 
-class GSIWord:
     def __init__(self, txt):
         txt = txt.strip().replace('*', '')
-        header = txt[:7]
-        self.data = header[7:]
-        self.wi = header[:2]
-        self.len = len(self.data)
-        self.index_info = None if header[3] == '.' else header[3]
-        self.input_mode = None if header[4] == '.' else header[4]
-        self.unit = header[5]
-        sign = header[6]
-        self.multiplier = 1 if sign == '+' else -1
+        label, unit_name, base_type, divider = word_format(txt)
+        self.wi = intern(txt[:2])
+        self.unit = txt[5]
+        self.value = word_value(txt, base_type, divider)
+
+    @classmethod
+    def of(cls, wi, unit, value):
+        word = cls.__new__(cls)
+        word.wi = wi
+        word.unit = unit
+        word.value = value
+        return word
 
     def get_value(self):
-        return int(self.data) / dict_units_dividers * self.sign
+        return self.value
 
     def get_content(self):
         return dict_labels[self.wi]
 
+    def get_unit(self):
+        return dict_units_attributes_digits[self.unit]
+
+    def __repr__(self):
+        return f"GSIWord({self.get_content()}={self.value!r} {self.get_unit()})"
+
+
+class GSIBlock:
+    """All words of one GSI line.
+
+    Word indices and units are kept in one interned layout string, a '*'
+    for GSI-16 followed by word index and unit of every word. The lines of
+    a job mostly share their layout, so a block costs little more than
+    the tuple of its converted values."""
+    __slots__ = ('layout', 'values')
+
+    def __init__(self, layout, values):
+        self.layout = layout
+        self.values = values
+
+    @property
+    def precision(self):
+        return 16 if self.layout[:1] == "*" else 8
+
+    def keys(self):
+        start = 1 if self.layout[:1] == "*" else 0
+        return [self.layout[i:i + 3] for i in range(start, len(self.layout), 3)]
+
+    @property
+    def words(self):
+        return tuple(GSIWord.of(key[:2], key[2], value) for key, value in zip(self.keys(), self.values))
+
+    def get(self, wi, default=None):
+        """Returns the value of the last word with word index wi."""
+        for key, value in zip(reversed(self.keys()), reversed(self.values)):
+            if key[:2] == wi:
+                return value
+        return default
+
+    def to_dicts(self):
+        """Returns the same pair of dicts as parse()."""
+        extracted = {'precision': self.precision}
+        units = {}
+        for key, value in zip(self.keys(), self.values):
+            label = dict_labels[key[:2]]
+            units[label] = dict_units_attributes_digits[key[2]]
+            if value is not None:
+                extracted[label] = value
+        return extracted, units
+
+    def __iter__(self):
+        return iter(self.words)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return f"GSIBlock(GSI{self.precision}, {list(self.words)})"
+
 
 def parse_word(word):
-    header = word[:7]
-    data = word[7:]
-    wi = header
+    return GSIWord(word)
+
+
+def parse_block(line):
+    """Parses a line like parse() but returns a GSIBlock, or None for lines without data."""
+    if len(line) <= 4:
+        return None
+    layout = []
+    if line[0] == "*":
+        layout.append("*")
+        line = line[1:]
+    values = []
+    for part in line.split():
+        label, unit_name, base_type, divider = word_format(part)
+        layout.append(part[:2] + part[5])
+        values.append(word_value(part, base_type, divider))
+    return GSIBlock(intern("".join(layout)), tuple(values))
+
+
+def word_format(part):
+    """Returns label, unit name, base type and divider of a word.
+
+    Raises a KeyError for unknown word indices and units."""
+    try:
+        return WORD_FORMATS[part[:2] + part[5]]
+    except KeyError:
+        # raises the KeyError for unknown word indices and units
+        return (dict_labels[part[:2]], dict_units_attributes_digits[part[5]],
+                dict_formats[part[:2]], dict_units_dividers[part[5]])
+
+
+def word_value(part, base_type, divider):
+    """Converts the data of a word, returns None if that is not possible."""
+    value = part[7:]
+    # positive values are identified by a '+' sign at the 7th place of a word
+    if base_type == "DOUBLE" and value.isdigit():
+        return float(value) / divider if part[6] == "+" else -float(value) / divider
+    if base_type == "TEXT":
+        return value
+    return convert_value(value, base_type, part[6], divider)
+
+
+def convert_value(value, base_type, sign, divider):
+    """Converts the data of a word that is not a plain digit string.
+
+    Returns None if the data can not be cast to base_type."""
+    try:
+        value = dict_typeConversions[base_type](value)
+    except ValueError:
+        return None
+    # Datetimes are done after the cast, numbers still have to be adjusted for sign and precision
+    if base_type == "DATE":
+        return value
+    return (value if sign == "+" else -value) / divider
+
+
+# Word index and unit character (the sixth place of a word) mapped to
+# label, unit name, base type and divider, so parse() needs one lookup per word.
+WORD_FORMATS = {wi + unit: (label, unit_name, dict_formats[wi], dict_units_dividers[unit])
+                for wi, label in dict_labels.items()
+                for unit, unit_name in dict_units_attributes_digits.items()}
+
+
+# Word headers (the first seven places of a word) seen by parse(), mapped to
+# label, unit name, base type and a divider that carries the sign of the word.
+# A job uses few distinct headers, so parse() needs one slice and one lookup per word.
+HEADER_FORMATS = {}
+MAX_HEADER_FORMATS = 4096
+
+
+def header_format(header):
+    """Returns the HEADER_FORMATS entry of a word header, raises a KeyError for unknown ones."""
+    label, unit_name, base_type, divider = word_format(header)
+    if header[6] != "+":
+        divider = -divider
+    if len(HEADER_FORMATS) >= MAX_HEADER_FORMATS:
+        HEADER_FORMATS.clear()
+    entry = HEADER_FORMATS[header] = (label, unit_name, base_type, divider)
+    return entry
 
 
 def parse(line):
@@ -368,39 +510,174 @@ def parse(line):
     else:
         precision = 8
     extracted['precision'] = precision
+    header_formats = HEADER_FORMATS
     for part in line.split():
-        identifier = part[:2]
-        idExtension = part[2]
-        compensatorInfo = part[3]
-        sourceInfo = part[4]
-        unitInfo = part[5]
-        signInfo = part[6]
-        value = part[7:]
-
-        # The first two places define the content of a part, which in turn defines the data type of the value
-        label = dict_labels[identifier]
-        baseType = dict_formats[identifier]
-        units[label] = dict_units_attributes_digits[unitInfo]
-        try:
-            # strings are simple, the require no further treatment before passing on, so they are exempt from processing:
-            if not baseType == "TEXT":
-                # everything else has to be cast to another type:
-                value = dict_typeConversions[baseType](value)
-                # Datetimes are now considered done, numbers still have to be adjusted for sign and precision:
-                if not baseType == "DATE":
-                    # positive values are identified by a '+' sign at the 7th place of a word
-
-                    if not signInfo == "+":
-                        value *= -1
-                    value /= dict_units_dividers[unitInfo]
-                    
-            # converted values are labeled and written to a dict
-            extracted[label] = value
-        except ValueError:
-            pass
+        # The header defines the content of a part, which in turn defines the data type of the value
+        header = part[:7]
+        entry = header_formats.get(header) or header_format(header)
+        label, unit_name, base_type, divider = entry
+        units[label] = unit_name
+        if base_type == "DOUBLE":
+            # -x / d equals x / -d exactly, the sign is part of the divider
+            try:
+                extracted[label] = float(part[7:]) / divider
+            except ValueError:
+                pass
+        elif base_type == "TEXT":
+            extracted[label] = part[7:]
+        else:
+            value = convert_value(part[7:], base_type, "+", divider)
+            if value is not None:
+                extracted[label] = value
     return extracted, units
 
 
+class GSIColumn:
+    """One word index of many GSI blocks, stored as NumPy arrays.
+
+    values holds the converted data of every block: float64 for numeric
+    words (scaled and signed), fixed width bytes for text and dates.
+    valid marks the blocks that carry the word and units the raw unit
+    character of each entry."""
+    __slots__ = ('wi', 'label', 'values', 'valid', 'units')
+
+    def __init__(self, wi, values, valid, units):
+        self.wi = wi
+        self.label = dict_labels[wi]
+        self.values = values
+        self.valid = valid
+        self.units = units
+
+    def get_unit(self, i):
+        return dict_units_attributes_digits.get(self.units[i].decode('ascii'))
+
+    def __len__(self):
+        return len(self.values)
+
+
+def parse_columns(lines, indices=None):
+    """Parses many GSI blocks into one GSIColumn per word index.
+
+    Returns a dict mapping word indices like '81' to their columns, plus
+    the GSI precision (8 or 16) of every block under 'precision'. Pass
+    indices to only extract some word indices. Requires NumPy."""
+    import numpy as np
+
+    precision = []
+    words = {}
+    for row, line in enumerate(lines):
+        if line[:1] == "*":
+            precision.append(16)
+            line = line[1:]
+        else:
+            precision.append(8)
+        for part in line.split():
+            wi = part[:2]
+            if indices is not None and wi not in indices:
+                continue
+            rows, units, signs, data = words.setdefault(wi, ([], [], [], []))
+            rows.append(row)
+            units.append(part[5])
+            signs.append(part[6])
+            data.append(part[7:])
+
+    n_blocks = len(precision)
+    dividers = np.ones(256)
+    for unit, divider in dict_units_dividers.items():
+        dividers[ord(unit)] = divider
+    columns = {'precision': np.array(precision, dtype=np.int8)}
+    for wi, (rows, units, signs, data) in words.items():
+        rows = np.array(rows, dtype=np.intp)
+        unit_codes = np.array(units, dtype='S1')
+        valid = np.zeros(n_blocks, dtype=bool)
+        column_units = np.zeros(n_blocks, dtype='S1')
+        column_units[rows] = unit_codes
+        if dict_formats[wi] == "DOUBLE":
+            raw = np.empty(len(data))
+            ok = np.ones(len(data), dtype=bool)
+            try:
+                raw[:] = np.array(data).astype(np.float64)
+            except ValueError:
+                # word by word, a word is valid if float() accepts it like in parse()
+                for i, d in enumerate(data):
+                    try:
+                        raw[i] = float(d)
+                    except ValueError:
+                        ok[i] = False
+            signed = np.where(np.array(signs) == "+", 1.0, -1.0)
+            values = np.full(n_blocks, np.nan)
+            values[rows[ok]] = (raw * signed / dividers[unit_codes.view(np.uint8)])[ok]
+            valid[rows[ok]] = True
+        else:
+            values = np.zeros(n_blocks, dtype='S16')
+            # iter_lines decodes corrupt bytes to U+FFFD, which is stored as '?'
+            values[rows] = np.char.encode(np.array(data), 'ascii', 'replace').astype('S16')
+            valid[rows] = True
+        columns[wi] = GSIColumn(wi, values, valid, column_units)
+    return columns
+
+
+def iter_lines(job, chunk_size=CHUNK_SIZE, max_line_size=MAX_LINE_SIZE):
+    """Yields the lines of a binary file object, reading chunk_size bytes at a time.
+
+    Only the current chunk and the incomplete line at its end are kept in
+    memory, so the size of the job does not matter. Like LineFramer, data
+    that runs longer than max_line_size without a line break, e.g. in a
+    file with CR only line endings, is handed out as one line."""
+    rest = bytearray()
+    while True:
+        chunk = job.read(chunk_size)
+        if not chunk:
+            break
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            rest += chunk
+        else:
+            rest += chunk[:end]
+            lines = rest.split(b"\n")
+            rest = bytearray(chunk[end + 1:])
+            for line in lines:
+                if line.strip():
+                    yield line.decode('ascii', 'replace')
+        if len(rest) > max_line_size:
+            if rest.strip():
+                yield rest.decode('ascii', 'replace')
+            rest = bytearray()
+    if rest.strip():
+        yield rest.decode('ascii', 'replace')
+
+
+def iter_file(path, chunk_size=CHUNK_SIZE, batch_size=None, strict=True, as_blocks=False):
+    """Parses a GSI-8 or GSI-16 job file block by block.
+
+    Yields the (data, units) pair of parse() for every block or, if
+    batch_size is given, lists of up to batch_size pairs. as_blocks yields
+    GSIBlocks instead of dict pairs. With strict=False blocks that can not
+    be parsed are skipped instead of raising."""
+    parser = parse_block if as_blocks else parse
+    batch = []
+    with open(path, 'rb') as job:
+        for line in iter_lines(job, chunk_size):
+            try:
+                record = parser(line)
+            except (KeyError, IndexError):
+                if strict:
+                    raise
+                continue
+            if record is None:
+                # parse_block has no block for lines like the '?' acknowledgement
+                continue
+            if batch_size is None:
+                yield record
+                continue
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
 def make_vertex(line):
     vtx_data = parse(line)[0]
     if 'targetZ' not in list(vtx_data.keys()):
@@ -0,0 +1,80 @@
+import logging
+from collections import deque
+
+from PyQt5.QtCore import QTimer
+
+
+class LogBuffer(logging.Handler):
+    """Logging handler that keeps the newest `capacity` records and shows them in a QPlainTextEdit.
+
+    emit() only appends the record to two bounded deques, nothing is
+    formatted or written to a terminal on the logging thread. Once a viewer
+    is attached, records are formatted and added with one appendPlainText
+    per `interval` ms, and the viewer keeps at most `max_blocks` lines, so
+    long sessions cost neither memory nor O(n) redraws per line. Which
+    records arrive is decided by the logger levels as usual:
+
+        log_buffer = LogBuffer()
+        logging.getLogger().addHandler(log_buffer)
+        logging.getLogger().setLevel(logging.INFO)  # DEBUG adds every request and reply
+        log_buffer.attach(window.log_viewer)
+    """
+    FORMAT = "%(asctime)s %(levelname)-7s %(name)s: %(message)s"
+    DATE_FORMAT = "%H:%M:%S"
+
+    def __init__(self, capacity=10000, level=logging.NOTSET, interval=200, max_blocks=5000):
+        super().__init__(level)
+        self.setFormatter(logging.Formatter(self.FORMAT, self.DATE_FORMAT))
+        self.records = deque(maxlen=capacity)
+        self.unflushed = deque(maxlen=capacity)
+        self.max_blocks = max_blocks
+        self.viewer = None
+        self.timer = QTimer()
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self._append_to_viewer)
+
+    def emit(self, record):
+        self.records.append(record)
+        self.unflushed.append(record)
+
+    def attach(self, viewer):
+        """Shows records in viewer from now on, including those buffered before."""
+        self.viewer = viewer
+        viewer.setMaximumBlockCount(self.max_blocks)
+        self.timer.start()
+
+    def detach(self):
+        self._append_to_viewer()
+        self.timer.stop()
+        self.viewer = None
+
+    def flush(self):
+        """Does nothing: logging calls it from any thread and at exit, the viewer is only written by the timer."""
+
+    def _append_to_viewer(self):
+        if self.viewer is None or not self.unflushed:
+            return
+        self.acquire()
+        try:
+            batch, self.unflushed = self.unflushed, deque(maxlen=self.unflushed.maxlen)
+        finally:
+            self.release()
+        lines = []
+        for record in batch:
+            try:
+                lines.append(self.format(record))
+            except Exception:
+                self.handleError(record)
+        self.viewer.appendPlainText("\n".join(lines))
+
+    def lines(self, level=logging.NOTSET):
+        """The buffered records of at least level, formatted."""
+        return [self.format(record) for record in list(self.records) if record.levelno >= level]
+
+    def close(self):
+        try:
+            self.timer.stop()
+        except RuntimeError:
+            pass  # logging closes its handlers at exit, after Qt deleted the timer
+        self.viewer = None
+        super().close()
@@ -0,0 +1,162 @@
+from math import ceil, log10
+from time import perf_counter
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+
+class LatencyHistogram:
+    """Counts latencies in HdrHistogram fashion: buckets doubling in width, each split in linear sub-buckets.
+
+    Values are recorded in whole microseconds. With the default 2
+    significant digits every value up to an hour is kept with less than 1 %
+    relative error, in at most a few thousand counters."""
+
+    def __init__(self, significant_digits=2):
+        # sub-buckets per bucket, the lower half overlaps with the previous bucket
+        self.sub_bucket_bits = ceil(log10(2 * 10 ** significant_digits) / log10(2))
+        self.half = 1 << (self.sub_bucket_bits - 1)
+        self.reset()
+
+    def reset(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = float("inf")
+        self.max = 0
+
+    def index(self, value):
+        shift = value.bit_length() - self.sub_bucket_bits
+        return shift * self.half + (value >> shift) if shift > 0 else value
+
+    def bucket_range(self, index):
+        """Lowest value and width of the values counted at index."""
+        if index < 2 * self.half:
+            return index, 1
+        shift = index // self.half - 1
+        return (index - shift * self.half) << shift, 1 << shift
+
+    def record(self, seconds):
+        value = int(seconds * 1000000 + 0.5) if seconds > 0 else 0
+        shift = value.bit_length() - self.sub_bucket_bits
+        index = shift * self.half + (value >> shift) if shift > 0 else value
+        counts = self.counts
+        counts[index] = counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """Highest latency in s below which percent of the values lie, None if nothing was recorded."""
+        if not self.count:
+            return None
+        rank = max(1, ceil(self.count * percent / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                lowest, width = self.bucket_range(index)
+                return min(lowest + width - 1, self.max) / 1000000
+        return self.max / 1000000
+
+    def snapshot(self):
+        if not self.count:
+            return {"count": 0, "mean": None, "min": None, "max": None, "p50": None, "p90": None, "p99": None,
+                    "p99.9": None}
+        return {"count": self.count, "mean": self.total / self.count / 1000000, "min": self.min / 1000000,
+                "max": self.max / 1000000, "p50": self.percentile(50), "p90": self.percentile(90),
+                "p99": self.percentile(99), "p99.9": self.percentile(99.9)}
+
+
+class Metrics(QObject):
+    """Latency histograms and counters of the requests going through a Dispatcher.
+
+    Pass an instance as metrics to the Dispatcher or to set_metrics(). The
+    queues then timestamp every request when it is appended and sent and
+    every reply when it is registered, and record per request label (the
+    TachyRequest class name) the round trip from sending to the reply, the
+    time spent waiting for a free transaction id, retries and time outs.
+    Replies nobody asked for are counted as unsolicited. Without metrics
+    the queues only check for None.
+
+    snapshot() returns everything as a dict, `updated` carries a snapshot
+    every `interval` ms once start() was called."""
+    updated = pyqtSignal(object)
+
+    def __init__(self, interval=1000, significant_digits=2, clock=perf_counter, parent=None):
+        super().__init__(parent)
+        self.clock = clock
+        self.significant_digits = significant_digits
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval)
+        self.timer.timeout.connect(self.publish)
+        self.reset()
+
+    def reset(self):
+        self.since = self.clock()
+        self.requests = {}
+        self.unsolicited = 0
+
+    def request_metrics(self, label):
+        metrics = self.requests.get(label)
+        if metrics is None:
+            metrics = self.requests[label] = {"round_trip": LatencyHistogram(self.significant_digits),
+                                              "queue_wait": LatencyHistogram(self.significant_digits),
+                                              "sent": 0, "replies": 0, "retries": 0, "timeouts": 0}
+        return metrics
+
+    def record_send(self, label):
+        (self.requests.get(label) or self.request_metrics(label))["sent"] += 1
+
+    def record_reply(self, label, queued, sent, received):
+        metrics = self.requests.get(label) or self.request_metrics(label)
+        metrics["replies"] += 1
+        metrics["round_trip"].record(received - sent)
+        metrics["queue_wait"].record(sent - queued)
+
+    def record_retry(self, label):
+        self.request_metrics(label)["retries"] += 1
+
+    def record_timeout(self, label):
+        self.request_metrics(label)["timeouts"] += 1
+
+    def record_unsolicited(self):
+        self.unsolicited += 1
+
+    def snapshot(self):
+        requests = {label: {"sent": metrics["sent"], "replies": metrics["replies"], "retries": metrics["retries"],
+                            "timeouts": metrics["timeouts"], "round_trip": metrics["round_trip"].snapshot(),
+                            "queue_wait": metrics["queue_wait"].snapshot()}
+                    for label, metrics in self.requests.items()}
+        return {"duration": self.clock() - self.since,
+                "sent": sum(metrics["sent"] for metrics in requests.values()),
+                "replies": sum(metrics["replies"] for metrics in requests.values()),
+                "timeouts": sum(metrics["timeouts"] for metrics in requests.values()),
+                "retries": sum(metrics["retries"] for metrics in requests.values()),
+                "unsolicited": self.unsolicited,
+                "requests": requests}
+
+    def publish(self):
+        self.updated.emit(self.snapshot())
+
+    def start(self):
+        self.timer.start()
+
+    def stop(self):
+        self.timer.stop()
+
+    def __str__(self):
+        snapshot = self.snapshot()
+        lines = [f"{snapshot['sent']} sent, {snapshot['replies']} replies, {snapshot['timeouts']} timeouts, "
+                 f"{snapshot['unsolicited']} unsolicited in {snapshot['duration']:.1f} s"]
+        for label, metrics in sorted(snapshot["requests"].items()):
+            round_trip = metrics["round_trip"]
+            if round_trip["count"]:
+                lines.append(f"{label}: {round_trip['count']} round trips, p50 {round_trip['p50'] * 1000:.1f} ms, "
+                             f"p99 {round_trip['p99'] * 1000:.1f} ms, max {round_trip['max'] * 1000:.1f} ms, "
+                             f"{metrics['timeouts']} timeouts")
+            else:
+                lines.append(f"{label}: {metrics['sent']} sent, {metrics['timeouts']} timeouts")
+        return "\n".join(lines)
@@ -0,0 +1,68 @@
+import json
+import os
+from time import time
+
+
+class PortCache:
+    """Remembers on which port an instrument was found, across sessions.
+
+    Entries are keyed by USB vendor id, product id and serial number of the
+    adapter, so they still match when the system hands out another port
+    name. Ports without USB identification are keyed by their name. Each
+    entry holds port_name, baud_rate, protocol (an ImplementationStates
+    name), instrument_name and the time it was last seen.
+    """
+    PATH = os.path.join(os.path.expanduser("~"), ".tachyconnect", "ports.json")
+
+    def __init__(self, path=None):
+        self.path = self.PATH if path is None else path
+        self.entries = self.load()
+
+    @staticmethod
+    def key(port_info, port_name=None):
+        if port_info.hasVendorIdentifier() and port_info.hasProductIdentifier():
+            return f"usb:{port_info.vendorIdentifier():04x}:{port_info.productIdentifier():04x}:" \
+                   f"{port_info.serialNumber()}"
+        return f"port:{port_name or port_info.portName()}"
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as cache_file:
+                entries = json.load(cache_file)
+        except (OSError, ValueError):
+            return {}
+        return entries if isinstance(entries, dict) else {}
+
+    def save(self):
+        # the cache only speeds up connecting, failing to write it is not an error
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path + ".tmp", "w", encoding="utf-8") as cache_file:
+                json.dump(self.entries, cache_file, indent=1)
+            os.replace(self.path + ".tmp", self.path)
+        except OSError:
+            pass
+
+    def lookup(self, port_infos):
+        """Returns (port_info, entry) pairs for the cached ports among port_infos, most recent first."""
+        known = [(port_info, self.entries[self.key(port_info)])
+                 for port_info in port_infos if self.key(port_info) in self.entries]
+        known.sort(key=lambda item: item[1].get("last_seen", 0), reverse=True)
+        return known
+
+    def remember(self, port_info, baud_rate, protocol, instrument_name=None, port_name=None):
+        """Stores a port, port_name is needed for ports the system does not enumerate."""
+        entry = self.entries.setdefault(self.key(port_info, port_name), {})
+        entry.update(port_name=port_name or port_info.portName(), baud_rate=baud_rate, protocol=protocol.name,
+                     last_seen=time())
+        if instrument_name is not None:
+            entry["instrument_name"] = instrument_name
+        self.save()
+
+    def forget(self, port_info):
+        if self.entries.pop(self.key(port_info), None) is not None:
+            self.save()
+
+    def clear(self):
+        self.entries = {}
+        self.save()
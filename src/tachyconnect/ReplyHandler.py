@@ -1,34 +1,41 @@
+import logging
+
 from PyQt5.QtCore import pyqtSignal, QObject, QEventLoop
 
-from tachyconnect.ts_control import TachyReply
+from tachyconnect.ts_control import TachyReply, CommunicationConstants
+
+log = logging.getLogger(__name__)
 
 
 class ReplyHandler(QObject):
     caught_reply = pyqtSignal(TachyReply)
     fall_back_signal = pyqtSignal(tuple)
     has_fall_back = False
-    slots = {}
 
     def __init__(self, fall_back = None):
         super().__init__()
+        self.slots = {}
+        self.decoders = {}
         if fall_back:
             self.fall_back_signal.connect(fall_back)
             self.has_fall_back = True
 
     def register_command(self, command_class, slot):
         self.slots[command_class.__name__] = slot
+        self.decoders[command_class.__name__] = command_class.decode
 
     def unregister_command(self, command_class):
         self.slots.pop(command_class.__name__, None)
 
     def handle(self, request, reply):
-        print(request)
-        print(reply)
-        self.caught_reply.emit(reply)
         command = request['message']
+        log.debug("%s: %s", command, reply)
+        self.caught_reply.emit(reply)
         slot = self.slots.get(command)
         if slot:
-            slot(*reply.get_result())
+            decode = self.decoders.get(command)
+            slot(*(decode(reply) if decode and reply.protocol == CommunicationConstants.GEOCOM
+                   else reply.get_result()))
             return True
         elif self.has_fall_back:
             self.fall_back_signal.emit((request, reply))
@@ -44,7 +51,7 @@ class CommandChain:
         self.commands = commands
 
     def set_commands(self, *args):
-        print('setting commands: ' + args)
+        log.debug("Setting commands: %s", args)
         self.commands = args
 
     def run_chain(self, *results):
@@ -64,8 +71,6 @@ class ChainableCommand:
     def __init__(self, command, *args):
         self.command = command
         self.args = args
-        print(self.command)
-        print(self.args)
-        print('ChainableCommand ctored.')
+        log.debug("Chainable command %s with %s", command, args)
 
 
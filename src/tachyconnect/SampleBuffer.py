@@ -0,0 +1,103 @@
+from operator import itemgetter
+from time import monotonic
+
+
+class SampleBuffer:
+    """Fixed size time series of measurements, the newest `capacity` samples. Requires NumPy.
+
+    Timestamps and values live in two arrays allocated up front, appending
+    writes one row and moves the head, so no Python object is kept per
+    sample. Samples have to be appended in time order, which holds for
+    arrival times from time.monotonic(). Range queries are binary searches
+    over the two sorted halves of the ring.
+
+    for_request() derives the columns from the returns of a request class,
+    feed() then decodes and stores a reply of that class:
+
+        buffer = SampleBuffer.for_request(TMC_QuickDist, capacity=10 * 3600 * 8)  # 8 h at 10 Hz
+        stream.subscribe(buffer.append_sample)
+        times, values = buffer.range(monotonic() - 60)
+        distances = values[:, buffer.index("slope_distance")]
+    """
+
+    def __init__(self, fields, capacity=65536, request_class=None):
+        import numpy as np
+        self.fields = list(fields)
+        self.capacity = capacity
+        self.request_class = request_class
+        self.times = np.empty(capacity, dtype=np.float64)
+        self.values = np.full((capacity, len(self.fields)), np.nan, dtype=np.float64)
+        self.head = 0
+        self.count = 0
+        self.record_values = None
+
+    @classmethod
+    def for_request(cls, request_class, capacity=65536):
+        """A buffer with the return code and the numeric returns of request_class as columns."""
+        numeric = [index + 1 for index, (_, kind) in enumerate(request_class.returns) if kind in (float, int, bool)]
+        buffer = cls(["rc"] + [request_class.returns[index - 1][0] for index in numeric], capacity, request_class)
+        buffer.record_values = itemgetter(0, *numeric) if numeric else lambda record: record[:1]
+        return buffer
+
+    def index(self, field):
+        return self.fields.index(field)
+
+    def append(self, time, values):
+        """Stores one sample, values are in the order of fields."""
+        head = self.head
+        self.times[head] = time
+        self.values[head] = values
+        self.head = (head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def append_record(self, time, record):
+        """Stores a decoded record of the request class, values that are None become NaN."""
+        values = self.record_values(record)
+        if None in values:
+            values = [float("nan") if value is None else value for value in values]
+        self.append(time, values)
+
+    def append_sample(self, sample):
+        # fits TrackingStream.subscribe
+        self.append_record(sample.time, sample.record)
+
+    def feed(self, reply, time=None):
+        """Decodes a reply with the request class and stores it, stamped now if time is not given."""
+        self.append_record(monotonic() if time is None else time, self.request_class.decode(reply))
+
+    def slices(self):
+        # the filled part of the ring, oldest samples first
+        if self.count < self.capacity:
+            return [slice(0, self.count)]
+        return [slice(self.head, self.capacity), slice(0, self.head)]
+
+    def range(self, start=None, end=None):
+        """Returns copies of the times and values of all samples with start <= time < end, oldest first."""
+        import numpy as np
+        times, values = [], []
+        for part in self.slices():
+            part_times = self.times[part]
+            first = 0 if start is None else np.searchsorted(part_times, start, side="left")
+            last = len(part_times) if end is None else np.searchsorted(part_times, end, side="left")
+            times.append(part_times[first:last])
+            values.append(self.values[part][first:last])
+        return np.concatenate(times), np.concatenate(values)
+
+    def column(self, field, start=None, end=None):
+        times, values = self.range(start, end)
+        return times, values[:, self.index(field)]
+
+    def latest(self):
+        """Time and values of the newest sample, None if the buffer is empty."""
+        if not self.count:
+            return None
+        newest = (self.head - 1) % self.capacity
+        return self.times[newest], self.values[newest].copy()
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
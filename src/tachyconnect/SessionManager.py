@@ -0,0 +1,134 @@
+from time import monotonic
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from tachyconnect.ts_control import Dispatcher, MessageQueue, PendingReply
+from tachyconnect.ReplyHandler import ReplyHandler
+
+
+class SessionManager(QObject):
+    """Drives several instruments from one thread.
+
+    Every instrument gets its own Dispatcher with event driven reading, so
+    all of them share the Qt event loop of the thread the manager lives in.
+    Requests are routed by the instrument id given to add_instrument.
+    """
+    instrument_added = pyqtSignal(str)
+    instrument_removed = pyqtSignal(str)
+    reply_received = pyqtSignal(str, object)
+    timed_out = pyqtSignal(str, object)
+    log = pyqtSignal(str)
+
+    def __init__(self, n_slots=7, window=None, retries=0, parent=None):
+        super().__init__(parent)
+        self.n_slots = n_slots
+        self.window = window
+        self.retries = retries
+        self.dispatchers = {}
+        self.counters = {}
+        self.started = monotonic()
+
+    def make_dispatcher(self):
+        geocom_queue = MessageQueue(self.n_slots, self.window, retries=self.retries)
+        return Dispatcher(MessageQueue(1), geocom_queue, ReplyHandler(), event_driven=True)
+
+    def add_instrument(self, instrument_id, port_name=None, dispatcher=None, device=None):
+        """Registers an instrument and opens its port if port_name is given.
+
+        Pass a dispatcher to manage one that is already set up and device
+        to talk through an open QIODevice such as a SimulatedPort."""
+        if instrument_id in self.dispatchers:
+            raise ValueError(f"Instrument {instrument_id} is already managed.")
+        if dispatcher is None:
+            dispatcher = self.make_dispatcher()
+        self.dispatchers[instrument_id] = dispatcher
+        self.counters[instrument_id] = {"sent": 0, "replies": 0, "timeouts": 0, "errors": 0, "latency": 0.0}
+        dispatcher.log.connect(lambda text: self.log.emit(f"{instrument_id}: {text}"))
+        dispatcher.timed_out.connect(lambda command: self.timed_out.emit(instrument_id, command))
+        if port_name is not None:
+            if not dispatcher.open_port(port_name):
+                self.log.emit(f"{instrument_id}: could not open {port_name}")
+            dispatcher.listen()
+        elif device is not None:
+            dispatcher.attach(device)
+            dispatcher.listen()
+        self.instrument_added.emit(instrument_id)
+        return dispatcher
+
+    def remove_instrument(self, instrument_id):
+        dispatcher = self.dispatchers.pop(instrument_id)
+        dispatcher.stop()
+        for queue in dispatcher.queues.values():
+            queue.close()
+        self.counters.pop(instrument_id)
+        self.instrument_removed.emit(instrument_id)
+
+    def send(self, instrument_id, request):
+        """Sends a TachyRequest (as geoCOM) or a TachyCommand to one instrument.
+
+        Returns the PendingReply of the request."""
+        try:
+            dispatcher = self.dispatchers[instrument_id]
+        except KeyError:
+            raise KeyError(f"Unknown instrument: {instrument_id}")
+        command = request.get_geocom_command() if hasattr(request, "get_geocom_command") else request
+        counters = self.counters[instrument_id]
+        sent = monotonic()
+        pending_reply = dispatcher.send(command)
+        counters["sent"] += 1
+
+        def count(pending_reply):
+            if pending_reply.error is None:
+                counters["replies"] += 1
+                counters["latency"] += monotonic() - sent
+                self.reply_received.emit(instrument_id, pending_reply.reply)
+            elif isinstance(pending_reply.error, TimeoutError):
+                counters["timeouts"] += 1
+            else:
+                counters["errors"] += 1
+
+        pending_reply.add_done_callback(count)
+        return pending_reply
+
+    def broadcast(self, make_request):
+        """Sends a fresh request from make_request() to every instrument.
+
+        make_request is usually a TachyRequest class. Returns a PendingReply
+        that resolves with a dict of replies by instrument id."""
+        instrument_ids = list(self.dispatchers)
+        pending_replies = [self.send(instrument_id, make_request()) for instrument_id in instrument_ids]
+        gathered = PendingReply.gather(*pending_replies)
+        by_instrument = PendingReply()
+        gathered.add_done_callback(lambda done: by_instrument.set_exception(done.error) if done.error
+                                   else by_instrument.set_result(dict(zip(instrument_ids, done.reply))))
+        return by_instrument
+
+    def reset_stats(self):
+        self.started = monotonic()
+        for counters in self.counters.values():
+            counters.update(sent=0, replies=0, timeouts=0, errors=0, latency=0.0)
+
+    def stats(self):
+        """Returns counters per instrument and their sum under 'total'.
+
+        Rates are replies per second since the manager was created or the
+        stats were reset, latencies mean round trip times in seconds."""
+        elapsed = max(monotonic() - self.started, 1e-9)
+        stats = {}
+        total = {"sent": 0, "replies": 0, "timeouts": 0, "errors": 0, "latency": 0.0}
+        for instrument_id, counters in self.counters.items():
+            stats[instrument_id] = dict(counters,
+                                        in_flight=sum(q.in_flight() for q in self.dispatchers[instrument_id].queues.values()),
+                                        replies_per_s=counters["replies"] / elapsed,
+                                        mean_latency=counters["latency"] / counters["replies"] if counters["replies"] else None)
+            for key in total:
+                total[key] += counters[key]
+        total["replies_per_s"] = total["replies"] / elapsed
+        total["mean_latency"] = total["latency"] / total["replies"] if total["replies"] else None
+        total["instruments"] = len(self.counters)
+        stats["total"] = total
+        return stats
+
+    def close(self):
+        for instrument_id in list(self.dispatchers):
+            self.remove_instrument(instrument_id)
@@ -0,0 +1,253 @@
+"""A software total station for loopback tests and benchmarks.
+
+SimulatedTotalStation answers geoCOM requests for every RPC in
+gc_constants.COMMAND_CODES and GSI GET/I/WI requests. Replies carry the
+values described by the returns of the TachyRequest classes, taken from
+the station's state; Set RPCs update the state read by the matching Get.
+Reply latency, jitter, loss and the transfer time at a given baud rate
+are emulated, requests are processed one after the other like on the
+instrument.
+
+Two transports are available:
+
+    port = SimulatedPort(SimulatedTotalStation(latency=0.02))  # in process, on the Qt event loop
+    dispatcher.attach(port)
+
+    server = PtyServer(SimulatedTotalStation())  # a pseudo terminal served from a thread
+    dispatcher.open_port(server.port_name)
+"""
+import os
+import random
+import select
+import threading
+from heapq import heappush, heappop
+from math import pi
+from time import monotonic
+
+from PyQt5.QtCore import QIODevice, QTimer, Qt
+from PyQt5.QtSerialPort import QSerialPort
+
+from . import gc_constants, TachyRequest
+from .ts_control import CommunicationConstants, LineFramer
+
+REQUEST_NAMES = {code: name for name, code in gc_constants.COMMAND_CODES.items()}
+
+
+class SimulatedTotalStation:
+    GSI_WORDS = {  # word index: (state key, unit digit, divider)
+        11: ("point", ".", None),
+        13: ("name", ".", None),
+        21: ("hz", "2", 100000),
+        22: ("v", "2", 100000),
+        31: ("slope_distance", "0", 1000),
+        81: ("e", "0", 1000),
+        82: ("n", "0", 1000),
+        83: ("h", "0", 1000),
+        87: ("reflector_height", "0", 1000),
+        88: ("height", "0", 1000),
+    }
+    MEASURED = ("hz", "v", "slope_distance", "e", "n", "h")
+
+    def __init__(self, latency=0.005, jitter=0.0, loss=0.0, baud_rate=None, noise=0.0, seed=None):
+        self.latency = latency  # s from the end of a request to its reply
+        self.jitter = jitter  # s, uniformly distributed on top of the latency
+        self.loss = loss  # share of requests that stay unanswered
+        self.baud_rate = baud_rate  # None transfers without delay
+        self.noise = noise  # standard deviation added to measured values
+        self.random = random.Random(seed)
+        self.state = {"digits": 15, "available": True, "name": "TPS1200 Simulator", "serial_number": 123456,
+                      "release": 1, "version": 0, "subversion": 0, "point": "1",
+                      "hz": 1.2345678, "v": 1.5707963, "slope_distance": 12.3456, "e": 100.0, "n": 200.0,
+                      "h": 10.0, "height": 1.55, "reflector_height": 0.0, "temperature": 21.5, "voltage": 7.4}
+        self.framer = LineFramer()
+        self.busy_until = 0.0
+        self.link_free = 0.0
+        self.requests = 0
+        self.replies = 0
+
+    def transfer_time(self, n_bytes):
+        # 8N1: ten bits per byte
+        return n_bytes * 10 / self.baud_rate if self.baud_rate else 0.0
+
+    def receive(self, data, now=None):
+        """Takes bytes written to the instrument and returns (due time, reply) pairs."""
+        now = monotonic() if now is None else now
+        arrival = now + self.transfer_time(len(data))
+        self.framer.feed(data)
+        scheduled = []
+        for line in self.framer.frames():
+            self.requests += 1
+            reply = self.answer(bytes(line))
+            ready = max(arrival, self.busy_until) + self.latency + self.random.uniform(0, self.jitter)
+            self.busy_until = ready
+            if reply is None or self.random.random() < self.loss:
+                continue
+            self.link_free = max(ready, self.link_free) + self.transfer_time(len(reply))
+            self.replies += 1
+            scheduled.append((self.link_free, reply))
+        return scheduled
+
+    def answer(self, line):
+        """The reply to one request line without terminator, None if there is none."""
+        text = line.decode('ascii', 'replace').strip()
+        if text.startswith(CommunicationConstants.GEOCOM_MESSAGE_PREFIX):
+            return self.answer_geocom(text)
+        if text.startswith("GET/I/WI") or text.startswith("GET/M/WI"):
+            return self.answer_gsi(text)
+        if text in ("a", "b"):
+            return b"?\r\n"
+        return b"@W127\r\n"
+
+    def answer_geocom(self, text):
+        header, _, arguments = text.partition(":")
+        try:
+            _, code, transaction_id = header.split(",")
+            code = int(code)
+        except ValueError:
+            return None
+        args = arguments.split(",") if arguments else []
+        name = REQUEST_NAMES.get(code)
+        values = []
+        if name is None:
+            rc = gc_constants.GRC_COM_PROC_UNAVAIL
+        else:
+            rc = gc_constants.GRC_OK
+            if "_Set" in name:
+                self.store(name.replace("_Set", "_Get", 1), args)
+            request_class = getattr(TachyRequest, name, None)
+            for field, kind in getattr(request_class, "returns", []):
+                values.append(self.format(field, kind))
+        payload = ",".join([str(rc)] + values)
+        return f"{CommunicationConstants.GEOCOM_REPLY_PREFIX},0,{transaction_id}:{payload}\r\n".encode('ascii')
+
+    def store(self, getter, args):
+        returns = getattr(getattr(TachyRequest, getter, None), "returns", [])
+        for (field, kind), arg in zip(returns, args):
+            try:
+                self.state[field] = arg.strip('"') if kind is str else float(arg) if kind is float else int(arg)
+            except ValueError:
+                pass
+
+    def value(self, field):
+        value = self.state.get(field, 0)
+        if self.noise and field in self.MEASURED:
+            value += self.random.gauss(0, self.noise)
+        return value
+
+    def format(self, field, kind):
+        value = self.value(field)
+        if kind is float:
+            return f"{float(value):.{int(self.state['digits'])}f}"
+        if kind is str:
+            return f'"{value}"'
+        if kind is bool:
+            return "1" if value else "0"
+        if kind is int:
+            return str(int(value))
+        # an enumeration of gc_constants
+        return str(value if field in self.state else next(iter(kind)).value)
+
+    def answer_gsi(self, text):
+        try:
+            word_index = int(text[8:].rstrip(";"))
+        except ValueError:
+            return b"@W127\r\n"
+        if word_index not in self.GSI_WORDS:
+            return b"@W127\r\n"
+        field, unit, divider = self.GSI_WORDS[word_index]
+        value = self.value(field)
+        if divider is None:
+            # GSI words are separated by blanks, so text loses its own
+            sign, data = "+", str(value).replace(" ", "")[-16:].rjust(16, "0")
+        else:
+            if unit == "2":
+                value = value * 200 / pi
+            sign, data = "+" if value >= 0 else "-", f"{round(abs(value) * divider):016d}"
+        return f"*{word_index:02d}...{unit}{sign}{data} \r\n".encode('ascii')
+
+
+class SimulatedPort(QIODevice):
+    """An open in-process connection to a SimulatedTotalStation.
+
+    Replies arrive through the Qt event loop of the thread the port lives
+    in, at the time the station scheduled them, and are announced with
+    readyRead like on a QSerialPort. Use it with Dispatcher.attach.
+    """
+
+    def __init__(self, station=None, port_name="simulator", parent=None):
+        super().__init__(parent)
+        self.station = SimulatedTotalStation() if station is None else station
+        self.port_name = port_name
+        self.buffer = bytearray()
+        self.open(QIODevice.ReadWrite)
+
+    def portName(self):
+        return self.port_name
+
+    def baudRate(self):
+        return self.station.baud_rate or CommunicationConstants.DEFAULT_BAUD_RATE
+
+    def error(self):
+        return QSerialPort.NoError
+
+    def clearError(self):
+        pass
+
+    def isSequential(self):
+        return True
+
+    def bytesAvailable(self):
+        return len(self.buffer) + super().bytesAvailable()
+
+    def canReadLine(self):
+        return b"\n" in self.buffer or super().canReadLine()
+
+    def readData(self, max_size):
+        data = bytes(self.buffer[:max_size])
+        del self.buffer[:max_size]
+        return data
+
+    def writeData(self, data):
+        now = monotonic()
+        for due, reply in self.station.receive(bytes(data), now):
+            QTimer.singleShot(max(0, round((due - now) * 1000)), Qt.PreciseTimer,
+                              lambda reply=reply: self.deliver(reply))
+        return len(data)
+
+    def deliver(self, reply):
+        if self.isOpen():
+            self.buffer.extend(reply)
+            self.readyRead.emit()
+
+
+class PtyServer(threading.Thread):
+    """Serves a SimulatedTotalStation on a pseudo terminal, open port_name like a serial port."""
+
+    def __init__(self, station=None):
+        super().__init__(daemon=True)
+        self.station = SimulatedTotalStation() if station is None else station
+        self.master, self.slave = os.openpty()
+        self.port_name = os.ttyname(self.slave)
+        self.running = True
+        self.start()
+
+    def run(self):
+        scheduled = []
+        while self.running:
+            timeout = max(0.0, scheduled[0][0] - monotonic()) if scheduled else 0.1
+            readable, _, _ = select.select([self.master], [], [], timeout)
+            if readable:
+                try:
+                    data = os.read(self.master, 4096)
+                except OSError:
+                    break
+                for due, reply in self.station.receive(data):
+                    heappush(scheduled, (due, self.station.replies, reply))
+            while scheduled and scheduled[0][0] <= monotonic():
+                os.write(self.master, heappop(scheduled)[2])
+
+    def stop(self):
+        self.running = False
+        self.join()
+        os.close(self.master)
+        os.close(self.slave)
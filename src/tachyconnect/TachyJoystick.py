@@ -1,3 +1,5 @@
+import logging
+
 from PyQt5.QtWidgets import QDialog
 from PyQt5.QtCore import Qt, pyqtSignal
 from .ui.tachy_joystick import Ui_Dialog as Ui_TachyJoystick
@@ -18,14 +20,16 @@ from tachyconnect.ReplyHandler import CommandChain, ChainableCommand
 
 import tachyconnect.gc_constants as gc
 
+log = logging.getLogger(__name__)
+
 class TachyJoystick(QDialog, Ui_TachyJoystick):
     MAX_SPEED = 0.42
     STEP = 0.06
 
     LOCKED = "🔒"
     UNLOCKED = " "
-    LOCK_STATES = {'0': UNLOCKED,
-                   '1': LOCKED}
+    LOCK_STATES = {gc.ON_OFF_TYPE.OFF: UNLOCKED,
+                   gc.ON_OFF_TYPE.ON: LOCKED}
     ref_z_received = pyqtSignal(str)
 
     def __init__(self, dispatcher, parent=None, flags=Qt.Dialog | Qt.Tool):
@@ -39,8 +43,6 @@ class TachyJoystick(QDialog, Ui_TachyJoystick):
         self.dispatcher.reply_handler.register_command(AUS_SetUserLockState, self.set_lock)
 
         # Other reply handling goes here
-        self.dispatcher.reply_handler.register_command(AUS_GetUserLockState, self.show_lock_state)
-        self.dispatcher.reply_handler.register_command(TMC_GetHeight, self.show_ref_height)
         self.dispatcher.reply_handler.register_command(AUT_PS_SearchNext, self.set_lock)
         # self.dispatcher.reply_handler.register_command(AUT_LockIn, self.get_lock_state)
 
@@ -51,7 +53,7 @@ class TachyJoystick(QDialog, Ui_TachyJoystick):
 
     ## BEGIN search reply handling
     def searched(self, *args):
-        print('searched')
+        log.debug("Searched")
         self.dispatcher.send(AUT_SetATRStatus(args=[gc.ON_OFF_TYPE.ON.value]).get_geocom_command())
 
     def tracking(self, *args):
@@ -62,22 +64,27 @@ class TachyJoystick(QDialog, Ui_TachyJoystick):
         self.get_lock_state()
     ## END search reply handling
     def get_ref_height(self):
-        self.dispatcher.send(TMC_GetHeight().get_geocom_command())
+        pending_reply = self.dispatcher.send(TMC_GetHeight().get_geocom_command())
+        pending_reply.resolved.connect(lambda reply: self.show_ref_height(*TMC_GetHeight.decode(reply)))
 
     def show_ref_height(self, *args):
-        z_text = f"{float(args[-1]):.3f}"
+        if args[0] != gc.GRC_OK or args[-1] is None:
+            self.refHeight.setText("n/a")
+            return
+        z_text = f"{args[-1]:.3f}"
         self.refHeight.setText(z_text)
         self.ref_z_received.emit(z_text)
 
     def get_lock_state(self):
-        self.dispatcher.send(AUS_GetUserLockState().get_geocom_command())
+        pending_reply = self.dispatcher.send(AUS_GetUserLockState().get_geocom_command())
+        pending_reply.resolved.connect(lambda reply: self.show_lock_state(*AUS_GetUserLockState.decode(reply)))
 
     def show_lock_state(self, *args):
         #print('Lock state: ' + args)
-        if args[0] == '0':
-            self.lockState.setText(TachyJoystick.LOCK_STATES[args[-1]])
+        if args[0] == gc.GRC_OK:
+            self.lockState.setText(TachyJoystick.LOCK_STATES.get(args[-1], TachyJoystick.UNLOCKED))
         else:
-            self.lockState.setText(TachyJoystick.LOCK_STATES[0])
+            self.lockState.setText(TachyJoystick.UNLOCKED)
 
     def connectSignalsSlots(self):
         self.joystickUp.clicked.connect(self.up)
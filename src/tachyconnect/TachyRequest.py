@@ -1,19 +1,25 @@
+from collections import namedtuple
 from datetime import datetime as dt
+from enum import Enum
 from . import gc_constants as gc
-from .ts_control import GeoCOMCommand, GSICommand, CommunicationConstants
+from .ts_control import GeoCOMCommand, GeoCOMTemplate, GSICommand, CommunicationConstants
 from PyQt5.QtCore import QObject
 
 class TachyRequest(QObject):
     gsi_command = ""
     gc_command = ""
     unpacking_keys = {}
+    returns = []  # names and types of the geoCOM reply values following the return code
     defaults = []
     description = ""
+    timeout = 2  # seconds, slow commands override this
 
-    def __init__(self, args = []):
+    def __init__(self, args = [], timeout = None):
         super().__init__()
         self.gc_command = str(gc.COMMAND_CODES.get(self.get_class_name()))
         self.args = args
+        if timeout is not None:
+            self.timeout = timeout
 
     def get_class_name(self):
         return self.__class__.__name__
@@ -24,10 +30,41 @@ class TachyRequest(QObject):
     def get_gsi_command(self):
         if self.gsi_command == "":
             raise NotImplementedError(f'No GSI command for {self.get_class_name()}')
-        return GSICommand(self.gsi_command, self.get_class_name(), *self.args)
+        command = GSICommand(self.gsi_command, self.get_class_name(), *self.args)
+        command.timeout = self.timeout
+        return command
 
     def get_geocom_command(self):
-        return GeoCOMCommand(self.gc_command, self.get_class_name(), *self.args)
+        command = GeoCOMCommand(self.gc_command, self.get_class_name(), *self.args)
+        command.timeout = self.timeout
+        return command
+
+    @classmethod
+    def template(cls):
+        """The GeoCOMTemplate of this class, built on first use."""
+        template = TEMPLATES.get(cls)
+        if template is None:
+            template = TEMPLATES[cls] = GeoCOMTemplate(gc.COMMAND_CODES.get(cls.__name__), cls.__name__, cls.timeout)
+        return template
+
+    @classmethod
+    def geocom_command(cls, *args, timeout=None):
+        """Like get_geocom_command, but only encodes args behind the precomputed prefix of the class.
+
+        No QObject is created, which makes this the way to send at high rates."""
+        return cls.template().request(*args, timeout=timeout)
+
+    @classmethod
+    def decode(cls, reply):
+        """Turns a GeoCOMReply into a typed record in one pass.
+
+        The record is a named tuple with the return code as rc followed by
+        the fields in returns, missing values are None. Classes without
+        returns give a plain tuple of rc and the remaining strings."""
+        decoder = DECODERS.get(cls)
+        if decoder is None:
+            decoder = DECODERS[cls] = compile_decoder(cls.__name__, cls.returns)
+        return decoder(reply.results)
 
     @classmethod
     def get_defaults(cls):
@@ -41,6 +78,54 @@ class TachyRequest(QObject):
             return ''
 
 
+TEMPLATES = {}
+DECODERS = {}
+
+
+def convert_string(value):
+    return value.strip('"')
+
+
+def convert_bool(value):
+    return value == "1"
+
+
+def converter(kind):
+    if kind is str:
+        return convert_string
+    if kind is bool:
+        return convert_bool
+    if isinstance(kind, type) and issubclass(kind, Enum):
+        members = {str(member.value): member for member in kind}
+        return lambda value: members.get(value, value)
+    return kind
+
+
+def compile_decoder(name, returns):
+    """Builds the decoder for one request class, see TachyRequest.decode."""
+    converters = [int] + [converter(kind) for _, kind in returns]
+    if returns:
+        record = namedtuple(f"{name}Result", ["rc"] + [field for field, _ in returns], defaults=[None] * len(converters))
+
+    def safe(convert, value):
+        # values that do not fit the schema are kept as they came
+        try:
+            return convert(value)
+        except ValueError:
+            return value
+
+    def decode(values):
+        try:
+            typed = [convert(value) for convert, value in zip(converters, values)]
+        except ValueError:
+            typed = [safe(convert, value) for convert, value in zip(converters, values)]
+        if returns:
+            return record(*typed)
+        return tuple(typed + values[1:])
+
+    return decode
+
+
 class COM_NullProc(TachyRequest):
     description = """Check Communication
 This function does not provide any functionality except of checking if the
@@ -75,6 +160,7 @@ values."""
 
 
 class COM_GetDoublePrecision(TachyRequest):
+    returns = [("digits", int)]
     description = """Get Double Precision Setting
 This function returns the precision - number of digits to the right of the
 decimal point - when double floating-point values are transmitted. The
@@ -96,6 +182,7 @@ radio data links. Reset to no delay can be done with nSendDelay = 0."""
 
 
 class COM_GetBinaryAvailable(TachyRequest):
+    returns = [("available", bool)]
     description = """Get Binary Attribute of Server
 This function gets the ability information about the server to handle binary
 communication. Since TPS1100 Release 2.00 the client may make requests in
@@ -115,6 +202,7 @@ FALSE: enable ASCII operation only."""]
 
 
 class COM_GetSWVersion(TachyRequest):
+    returns = [("release", int), ("version", int), ("subversion", int)]
     gsi_command = "GET/I/WI593;"
     description = """Retrieve Server Release Information
 This function retrieves the current GeoCOM release (release, version and
@@ -201,18 +289,21 @@ Replaced by: EDM_SetEGLIntensity in TPS1100"""
 
 
 class EDM_GetTrkLightSwitch(TachyRequest):
+    returns = [("switch", gc.ON_OFF_TYPE)]
     description = """Get status of tracklight switch
 The Tracklight must be available for EDM.
 Replaced by: EDM_GetEGLIntensity in TPS1100"""
 
 
 class EDM_GetTrkLightBrightness(TachyRequest):
+    returns = [("brightness", gc.EDM_TRKLIGHT_BRIGHTNESS)]
     description = """Get value of intensity of tracklight
 The Tracklight must be available for EDM.
 Replaced by: EDM_GetEGLIntensity"""
 
 
 class EDM_GetBumerang(TachyRequest):
+    returns = [("filter", gc.ON_OFF_TYPE)]
     description = """Get status of boomerang filter
 Call this function to retrieve the status of the "boomerang filter" (i.e. ON,
 OFF). If the distance is within 60-100 meters and the boomerang filter is
@@ -224,6 +315,7 @@ Deleted in TPS1100"""
 
 
 class EDM_GetEglIntensity(TachyRequest):
+    returns = [("intensity", gc.EDM_EGLINTENSITY_TYPE)]
     description = """Get value of intensity of guide light
 The Electronic Guide Light must be implemented in the theodolite."""
 
@@ -237,6 +329,9 @@ New since TPS1100"""
 
 
 class TMC_GetAngle1(TachyRequest):
+    returns = [("hz", float), ("v", float), ("angle_accuracy", float), ("angle_time", int),
+               ("cross_incline", float), ("length_incline", float), ("incline_accuracy", float),
+               ("incline_time", int), ("face", int)]
     description = """Returns complete angle measurement
 This function carries out an angle measurement and, in dependence of
 configuration, inclination measurement and returns the results. As shown
@@ -254,6 +349,7 @@ This function switches the dual axis compensator on or off."""
 
 
 class TMC_GetInclineSwitch(TachyRequest):
+    returns = [("switch", gc.ON_OFF_TYPE)]
     description = """Get the dual axis compensator's state
 This function returns the current dual axis compensator's state."""
 
@@ -273,9 +369,11 @@ TMC_DEF_DIST, the distance sensor will be work with the set EDM
 mode, see TMC_SetEdmMode."""
     defaults = [gc.TMC_MEASURE_PRG.TMC_DEF_DIST, gc.TMC_INCLINE_PRG.TMC_AUTO_INC]
     helptexts = ["TMC measurement mode.", "Inclination sensor measurement mode."]
+    timeout = 10
 
 
 class TMC_GetStation(TachyRequest):
+    returns = [("e0", float), ("n0", float), ("h0", float), ("hi", float)]
     description = """Get the coordinates of the instrument station
 This function is used to get the co-ordinates of the instrument station."""
 
@@ -291,6 +389,7 @@ This function is used to set the co-ordinates of the instrument station."""
 
 
 class TMC_GetHeight(TachyRequest):
+    returns = [("height", float)]
     gsi_command = "GET/I/WI88"
     description = """Returns the current reflector height
 This function returns the current reflector height."""
@@ -305,6 +404,8 @@ This function sets a new reflector height."""
 
 
 class TMC_GetAngSwitch(TachyRequest):
+    returns = [("incline", gc.ON_OFF_TYPE), ("stand_axis", gc.ON_OFF_TYPE), ("collimation", gc.ON_OFF_TYPE),
+               ("tilt_axis", gc.ON_OFF_TYPE)]
     description = """Get angular correction's states
 This function returns the angular correction's state."""
 
@@ -347,11 +448,13 @@ configuration."""
 
 
 class TMC_GetEdmMode(TachyRequest):
+    returns = [("mode", gc.EDM_MODE)]
     description = """Get the EDM measurement mode
 This function returns the EDM measurement mode."""
 
 
 class TMC_GetSignal(TachyRequest):
+    returns = [("intensity", float), ("time", int)]
     description = """Get information about EDM’s signal amplitude
 This function returns information about the amplitude of the EDM signal.
 The function only can perform measuring if the signal measurement
@@ -362,6 +465,7 @@ Command = TMC_CLEAR"""
 
 
 class TMC_GetPrismCorr(TachyRequest):
+    returns = [("prism_correction", float)]
     description = """Get the prism constant
 This function is used to get the prism constant."""
 
@@ -375,6 +479,7 @@ The high-level function BAP_SetPrismType overwrites this setting."""
 
 
 class TMC_GetFace(TachyRequest):
+    returns = [("face", int)]
     description = """Get face information of current telescope position
 This function returns the face information of the current telescope position.
 The face information is only valid, if the instrument is in an active
@@ -395,6 +500,7 @@ This function is used to set the parameters for the atmospheric correction."""
 
 
 class TMC_GetAtmCorr(TachyRequest):
+    returns = [("wave_length", float), ("pressure", float), ("dry_temperature", float), ("wet_temperature", float)]
     description = """Get atmospheric correction parameters
 This function is used to get the parameters for the atmospheric correction."""
 
@@ -409,6 +515,7 @@ measured height difference."""
 
 
 class TMC_GetRefractiveCorr(TachyRequest):
+    returns = [("refraction_on", bool), ("earth_radius", float), ("refractive_scale", float)]
     gsi_command = "GET/I/WI538"
     description = """Get the refraction factor
 This function is used to get the refraction distortion factor for correction of
@@ -416,6 +523,8 @@ measured height difference."""
 
 
 class TMC_GetCoordinate(TachyRequest):
+    returns = [("e", float), ("n", float), ("h", float), ("time", int), ("e_continuous", float),
+               ("n_continuous", float), ("h_continuous", float), ("time_continuous", int)]
     description = """Gets the coordinates of a measured point
 This function issues an angle measurement and, in dependence of the
 selected Mode, an inclination measurement and calculates the co-ordinates
@@ -446,11 +555,13 @@ of the world)"""]
 
 
 class TMC_GetRefractiveMethod(TachyRequest):
+    returns = [("method", int)]
     description = """Get the refraction model
 This function is used to get the current refraction model."""
 
 
 class TMC_GetAngle5(TachyRequest):
+    returns = [("hz", float), ("v", float)]
     description = """Returns simple angle measurement
 This function carries out an angle measurement and returns the results. In
 contrast to the function TMC_GetAngle1 this function returns only the
@@ -460,6 +571,7 @@ Information about measurement is returned in the return code."""
 
 
 class TMC_GetSimpleMea(TachyRequest):
+    returns = [("hz", float), ("v", float), ("slope_distance", float)]
     description = """Returns angle and distance measurement
 This function returns the angles and distance measurement data. The
 distance measurement will be set invalid afterwards. It is important to note
@@ -509,6 +621,7 @@ active."""
 
 
 class TMC_GetSimpleCoord(TachyRequest):
+    returns = [("e", float), ("n", float), ("h", float)]
     description = """Get cartesian coordinates
 This function get the cartesian co-ordinates if a valid distance existing. The
 parameter WaitTime defined the max wait time in order to get a valid
@@ -528,6 +641,7 @@ mode any time."""]
 
 
 class TMC_QuickDist(TachyRequest):
+    returns = [("hz", float), ("v", float), ("slope_distance", float)]
     description = """Returns slope-distance and hz-,v-angle
 The function waits until a new distance is measured and then it returns the angle
 and the slope-distance, but no co-ordinates. Is no distance available, then it returns
@@ -553,17 +667,20 @@ must be in stable state for more than 3sec.)."""
 
 
 class TMC_GetSlopeDistCorr(TachyRequest):
+    returns = [("ppm_correction", float), ("prism_correction", float)]
     description = """Get slope distance correction factors
 This function retrieves the correction factors that are used for slope
 distance measurement corrections."""
 
 
 class CSV_GetInstrumentNo(TachyRequest):
+    returns = [("serial_number", int)]
     description = """Get factory defined instrument number
 Returns the serial number."""
 
 
 class CSV_GetInstrumentName(TachyRequest):
+    returns = [("name", str)]
     gsi_command = "GET/I/WI13"
     description = """Get Leica specific instrument name
 Returns the instrument name"""
@@ -577,6 +694,7 @@ Deleted in TPS1100+"""
 
 
 class CSV_GetUserInstrumentName(TachyRequest):
+    returns = [("name", str)]
     description = """Get user defined instrument name
 This name can be set by the user (see CSV_SetUserInstrumentName) If
 no user instrument name is set the return code is RC_UNDEFINED and the
@@ -603,35 +721,41 @@ further information)"""
 
 
 class CSV_GetVBat(TachyRequest):
+    returns = [("voltage", float), ("state", int)]
     description = """Get the value of the voltage supply
 The value of Vbat gives information about the state of charge of the battery.
 New function TPS1100+: CSV_CheckPower"""
 
 
 class CSV_GetVMem(TachyRequest):
+    returns = [("voltage", float), ("state", int)]
     description = """Get value of the memory backup voltage supply
 This routine returns the capacity of the current power source and its source
 (internal or external)."""
 
 
 class CSV_GetIntTemp(TachyRequest):
+    returns = [("temperature", float)]
     description = """Get the temperature
 Get the internal temperature of the instrument, measured on the Mainboard
 side. Values are reported in degrees Celsius."""
 
 
 class CSV_GetSWVersion(TachyRequest):
+    returns = [("release", int), ("version", int), ("subversion", int)]
     description = """Retrieve Server Release Information
 This function retrieves the current GeoCOM release (release, version and
 subversion) of the server."""
 
 
 class CSV_GetSWVersion2(TachyRequest):
+    returns = [("release", int), ("version", int), ("subversion", int)]
     description = """Get Software Version
 Returns the system software version."""
 
 
 class CSV_GetDeviceConfig(TachyRequest):
+    returns = [("device_class", gc.TPS_DEVICE_CLASS), ("device_type", int)]
     description = """Get instrument configuration
 This function returns information about the class and the configuration type
 of the instrument."""
@@ -671,6 +795,7 @@ is +/- 0.79 rad/s each."""
 
 
 class MOT_ReadLockStatus(TachyRequest):
+    returns = [("status", gc.MOT_LOCK_STATUS)]
     description = """Return condition of LockIn control
 This function returns the current condition of the LockIn control (see
 subsystem AUT for further information). This command is valid for TCA
@@ -678,6 +803,7 @@ instruments only."""
 
 
 class WIR_GetRecFormat(TachyRequest):
+    returns = [("format", gc.WIR_RECFORMAT)]
     description = """Get Record Format
 This function retrieves which recording format is in use.
 0 defines recording format is GSI (standard)
@@ -708,6 +834,7 @@ in Hz and V direction [rad]."""]
 
 
 class AUT_ReadTol(TachyRequest):
+    returns = [("hz", float), ("v", float)]
     description = """Read current setting for the positioning tolerances
 This command reads the current setting for the positioning tolerances of the
 Hz- and V- instrument axis.
@@ -728,6 +855,7 @@ between 1 [sec] and 60 [sec]."""]
 
 
 class AUT_ReadTimeout(TachyRequest):
+    returns = [("hz", float), ("v", float)]
     description = """Read current timeout setting for positioning
 This command reads the current setting for the positioning time out
 (maximum time to perform positioning)."""
@@ -741,6 +869,7 @@ can be called several times. If the target is already locked, the command
 will be ignored. The LOCK mode must be enabled for this functionality,
 see AUS_SetUserLockState and AUS_GetUserLockState. The ATR
 can only lock the target, if it is in the field of view (FoV)."""
+    timeout = 10
 
 
 class AUT_SetATRStatus(TachyRequest):
@@ -758,6 +887,7 @@ New function TPS1100+: AUS_SetUserAtrState"""
 
 
 class AUT_GetATRStatus(TachyRequest):
+    returns = [("status", gc.ON_OFF_TYPE)]
     description = """Get the status of the ATR mode
 Get the current status of the ATR mode on TCA instruments. This
 command does not indicate whether the ATR has currently acquired a
@@ -783,6 +913,7 @@ New Function TPS1100+: AUT_SetUserLockState"""
 
 
 class AUT_GetLockStatus(TachyRequest):
+    returns = [("status", gc.ON_OFF_TYPE)]
     description = """Get the status of the lock switch
 This command gets the current LOCK switch. This command is valid for
 TCA instruments only and does not indicate whether the ATR has a prism
@@ -829,6 +960,7 @@ only possible if ATR exists and is
 activated.""",
                  """It’s reserved for future use, set bDummy
 always to FALSE"""]
+    timeout = 30
 
 
 class AUT_MakePositioning4(AUT_MakePositioning):
@@ -865,6 +997,7 @@ AUT_POSITION: conventional position to other face.
 AUT_TARGET: tries to position onto a target in the destination area.
 This set is only possible if ATR exists and is activated.""",
 """It’s reserved for future use, set bDummy always to FALSE"""]
+    timeout = 30
 
 
 class AUT_ChangeFace4(AUT_ChangeFace):
@@ -888,6 +1021,7 @@ have a target search and a fine positioning in one function."""
     helptexts = ["Horizontal search region [rad].",
                  "Vertical search region [rad].",
                  "It’s reserved for future use, set bDummy always to FALSE"]
+    timeout = 30
 
 
 class AUT_Search2(AUT_Search):
@@ -895,6 +1029,7 @@ class AUT_Search2(AUT_Search):
 
 
 class AUT_GetFineAdjustMode(TachyRequest):
+    returns = [("mode", gc.AUT_ADJMODE)]
     description = """Get fine adjust positioning mode
 This function returns the current activated fine adjust positioning mode.
 This command is valid for all instruments, but has only effects for TCA
@@ -939,6 +1074,7 @@ TMC)."""
     helptexts = ["Search range Hz-axis",
                  "Search range V-axis",
                  "It’s reserved for future use, set bDummy always to FALSE"]
+    timeout = 20
 
 
 class AUT_FineAdjust3(AUT_FineAdjust):
@@ -946,6 +1082,7 @@ class AUT_FineAdjust3(AUT_FineAdjust):
 
 
 class AUT_GetUserSpiral(TachyRequest):
+    returns = [("range_hz", float), ("range_v", float)]
     description = """Get user searching spiral
 This function returns the current dimension of the searching spiral. This
 command is valid for all instruments, but has only effects for TCA
@@ -961,6 +1098,7 @@ valid for all instruments, but has only effects for TCA instruments."""
 
 
 class AUT_GetSearchArea(TachyRequest):
+    returns = [("center_hz", float), ("center_v", float), ("range_hz", float), ("range_v", float), ("enabled", bool)]
     description = """Get user searching area
 This function returns the current user searching area. This command is
 valid for all instruments, but has only effects for TCA instruments."""
@@ -1009,12 +1147,14 @@ TPS1200+"""
     helptexts = ["Defines the searching direction (CLKW=1 or ACLKW=-1)", """TRUE: Searching starts -10 gon to the given direction
 lDirection. This setting finds targets left of the telescope
 direction faster"""]
+    timeout = 60
 
 
 class AUT_PS_SearchWindow(TachyRequest):
     description = """Starting PowerSearch
 This command starts PowerSearch inside the given PowerSearch window, defined by AUT_SetSearchArea
 and optional by AUT_PS_SetRange"""
+    timeout = 60
 
 
 class BMM_BeepOn(TachyRequest):
@@ -1054,6 +1194,7 @@ it will be stopped before."""
 
 
 class CTL_GetUpCounter(TachyRequest):
+    returns = [("power_on", int), ("wake_up", int)]
     description = """Get Up Counter
 This function retrieves how often, since the last call of this function, the
 TPS1100 instrument has been switched on and how often it has been
@@ -1062,6 +1203,7 @@ Zero once the function has been called."""
 
 
 class SUP_GetConfig(TachyRequest):
+    returns = [("reserved", int), ("auto_power", gc.SUP_AUTO_POWER), ("timeout", int)]
     description = """Get power management configuration status
 The returned settings are power off configuration and timing."""
 
@@ -1097,6 +1239,7 @@ off when internal temperature fall short of
 
 
 class BAP_GetLastDisplayedError(TachyRequest):
+    returns = [("error", int), ("gsi_error", int)]
     description = """Get last TPS system error number
 This function returns the last displayed error and clears it in the TPS
 system. So a second GetLastDisplayedError call will result in
@@ -1112,6 +1255,7 @@ prism constant, set by TMC_SetPrismCorr."""
 
 
 class BAP_GetPrismType(TachyRequest):
+    returns = [("prism_type", gc.BAP_PRISMTYPE)]
     description = """Get actual prism type
 Gets the current prism type."""
 
@@ -1124,9 +1268,11 @@ controls the special beep (sector or lost lock), maintains measurement icons
 and disables the "FNC"-key during tracking."""
     defaults = [gc.BAP_MEASURE_PRG.BAP_DEF_DIST]
     helptexts = ["BAP_DEF_DIST, pre-defined using BAP_SetMeasPrg"]
+    timeout = 10
 
 
 class BAP_GetMeasPrg(TachyRequest):
+    returns = [("program", gc.BAP_USER_MEASPRG)]
     description = """Get actual distance measurement program"""
 
 
@@ -1150,6 +1296,7 @@ functionality is only available by ATR instruments."""
     defaults = [gc.BOOLEAN_TYPE.FALSE]
     helptexts = ["""It’s reserved for future use, set bDummy
 always to FALSE"""]
+    timeout = 30
 
 
 class BAP_SetTargetType(TachyRequest):
@@ -1165,12 +1312,14 @@ types."""
 
 
 class BAP_GetTargetType(TachyRequest):
+    returns = [("target_type", gc.BAP_TARGET_TYPE)]
     description = """Get actual target type
 Gets the current target type for distance measurements (with reflector or
 without reflector)."""
 
 
 class BAP_GetPrismDef(TachyRequest):
+    returns = [("name", str), ("constant", float), ("reflector_type", gc.BAP_REFLTYPE)]
     description = """Get a prism definition
 Get the definition of a prism."""
     defaults = [gc.BAP_PRISMTYPE.BAP_PRISM_360]
@@ -1189,6 +1338,7 @@ BAP_PRISM_USER1.. BAP_PRISM_USER3""",
 
 
 class AUS_GetUserAtrState(TachyRequest):
+    returns = [("state", gc.ON_OFF_TYPE)]
     description = """Get the status of the ATR mode
 Get the current status of the ATR mode on TCA instruments. This
 command does not indicate whether the ATR has currently acquired a
@@ -1206,6 +1356,7 @@ automatically also."""
 
 
 class AUS_GetUserLockState(TachyRequest):
+    returns = [("state", gc.ON_OFF_TYPE)]
     description = """Get the status of the lock switch
 This command gets the current LOCK switch. This command is valid for
 TCA instruments only and does not indicate whether the ATR has a prism
@@ -1242,6 +1393,7 @@ This command is valid for TCA instruments only."""
 
 
 class AUS_GetRcsSearchSwitch(TachyRequest):
+    returns = [("switch", gc.ON_OFF_TYPE)]
     description = """Get RCS-Searching mode switch
 This command gets the current RCS-Searching mode switch.
 If RCS style searching is enabled, then the extended searching for
@@ -0,0 +1,115 @@
+from collections import deque, namedtuple
+from enum import Enum
+from math import sqrt
+from time import monotonic
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from tachyconnect.TachyRequest import TMC_QuickDist
+
+Sample = namedtuple("Sample", ["time", "record"])
+
+
+class TrackingStream(QObject):
+    """Measures continuously by keeping `depth` requests in flight.
+
+    Every reply is timestamped on arrival, decoded with the request class
+    and published as a Sample(time, record) to the subscribers and into a
+    ring buffer of the last `capacity` samples. Pass a SampleBuffer as buffer
+    to keep long time series in arrays as well. The instrument measures one
+    request after the other, the requests in flight only hide the link's
+    round trip time. Use TMC_QuickDist for polar or TMC_GetSimpleCoord for
+    cartesian samples:
+
+        stream = TrackingStream(dispatcher)
+        stream.subscribe(lambda sample: print(sample.time, sample.record.slope_distance))
+        stream.start()
+    """
+    sample_received = pyqtSignal(object)
+    stopped = pyqtSignal()
+
+    def __init__(self, dispatcher, request_class=TMC_QuickDist, args=None, depth=2, capacity=4096, buffer=None,
+                 parent=None):
+        super().__init__(parent)
+        self.dispatcher = dispatcher
+        self.request_class = request_class
+        args = request_class.get_defaults() if args is None else args
+        self.args = [arg.value if isinstance(arg, Enum) else arg for arg in args]
+        self.depth = depth
+        self.samples = deque(maxlen=capacity)
+        self.subscribers = []
+        self.buffer = buffer
+        if buffer is not None:
+            self.subscribe(buffer.append_sample)
+        self.running = False
+        self.in_flight = 0
+        self.errors = 0
+        self.timeouts = 0
+
+    def subscribe(self, callback):
+        """callback is called with every Sample, it should return quickly."""
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def start(self):
+        self.running = True
+        while self.in_flight < self.depth:
+            if not self.request():
+                break
+
+    def stop(self):
+        """Stops sending, replies of requests in flight are still published."""
+        self.running = False
+        if not self.in_flight:
+            self.stopped.emit()
+
+    def request(self):
+        pending_reply = self.dispatcher.send(self.request_class.geocom_command(*self.args))
+        if not pending_reply:
+            self.running = False
+            self.errors += 1
+            return False
+        self.in_flight += 1
+        pending_reply.add_done_callback(self.reply_arrived)
+        return True
+
+    def reply_arrived(self, pending_reply):
+        arrival = monotonic()
+        self.in_flight -= 1
+        if pending_reply.error is None:
+            sample = Sample(arrival, self.request_class.decode(pending_reply.reply))
+            self.samples.append(sample)
+            for callback in self.subscribers:
+                callback(sample)
+            self.sample_received.emit(sample)
+        elif isinstance(pending_reply.error, TimeoutError):
+            self.timeouts += 1
+        else:
+            self.errors += 1
+        if self.running:
+            self.request()
+        elif not self.in_flight:
+            self.stopped.emit()
+
+    def stats(self):
+        """Sample rate in Hz and the jitter of the intervals between samples in s, over the ring buffer."""
+        times = [sample.time for sample in self.samples]
+        intervals = [later - earlier for earlier, later in zip(times, times[1:])]
+        stats = {"samples": len(times), "timeouts": self.timeouts, "errors": self.errors,
+                 "rate": None, "mean_interval": None, "jitter": None, "max_interval": None}
+        if intervals:
+            mean = sum(intervals) / len(intervals)
+            stats.update(rate=1 / mean if mean else None, mean_interval=mean, max_interval=max(intervals),
+                         jitter=sqrt(sum((interval - mean) ** 2 for interval in intervals) / len(intervals)))
+        return stats
+
+    def __str__(self):
+        stats = self.stats()
+        if stats["rate"] is None:
+            return f"{self.request_class.__name__} stream: {stats['samples']} samples"
+        return (f"{self.request_class.__name__} stream: {stats['rate']:.1f} Hz, "
+                f"jitter {stats['jitter'] * 1000:.1f} ms over {stats['samples']} samples, "
+                f"{stats['timeouts']} timeouts")
@@ -0,0 +1,179 @@
+"""GeoCOM over asyncio streams, for services that do not run a Qt event loop.
+
+The client reuses the request and reply classes from TachyRequest and
+ts_control and follows the MessageQueue semantics: a bounded window of
+requests in flight keyed by transaction id, a FIFO for everything beyond
+it, and per-request timeouts with optional retries.
+
+    client = await open_connection("192.168.0.10", 4001)
+    reply = await client.request(TMC_GetSimpleMea(args=[...]))
+    print(reply.get_result())
+
+Any number of clients can share one event loop, one per instrument.
+"""
+import asyncio
+from collections import deque
+
+from .ts_control import CommunicationConstants, GeoCOMReply, LineFramer, TachyReply, TransactionIds
+
+READ_SIZE = 4096
+
+
+class GeoCOMClient:
+    def __init__(self, reader, writer, n_slots=7, window=None, retries=0, backoff=2.0, max_pending=1024):
+        self.reader = reader
+        self.writer = writer
+        self.ids = TransactionIds(n_slots)
+        self.window = n_slots if window is None else max(1, min(window, n_slots))
+        self.retries = retries
+        self.backoff = backoff
+        self.max_pending = max_pending
+        self.slots = {}
+        self.pending = deque()
+        self.framer = LineFramer()
+        self.on_unsolicited = None
+        self.reader_task = asyncio.get_running_loop().create_task(self.read_replies())
+
+    async def request(self, request, timeout=None):
+        """Sends a TachyRequest (or a GeoCOMCommand) and returns its GeoCOMReply.
+
+        Raises asyncio.TimeoutError if the instrument does not answer in
+        time and ConnectionError if the connection is lost meanwhile."""
+        command = request.get_geocom_command() if hasattr(request, "get_geocom_command") else request
+        if command.protocol != CommunicationConstants.GEOCOM:
+            raise ValueError(f"{command} is not a geoCOM command")
+        if timeout is not None:
+            command.timeout = timeout
+        if self.reader_task.done():
+            raise ConnectionError("Connection to the instrument is closed.")
+        future = asyncio.get_running_loop().create_future()
+        if len(self.slots) < self.window and not self.pending:
+            self.transmit(command, future)
+        elif self.max_pending is not None and len(self.pending) >= self.max_pending:
+            raise BufferError("Too many requests waiting to be sent.")
+        else:
+            self.pending.append((command, future))
+        return await future
+
+    async def gather(self, *requests):
+        """Sends all requests pipelined and returns their replies in order."""
+        return await asyncio.gather(*(self.request(request) for request in requests))
+
+    def transmit(self, command, future):
+        slot = self.ids.acquire()
+        command.set_transaction_id(slot)
+        self.writer.write(command.bytes)
+        handle = asyncio.get_running_loop().call_later(command.timeout, self.expire, slot)
+        self.slots[slot] = {"message": command.label, "command": command, "future": future,
+                            "attempt": 0, "deadline": handle}
+
+    def drain(self):
+        while self.pending and len(self.slots) < self.window:
+            command, future = self.pending.popleft()
+            if not future.done():
+                self.transmit(command, future)
+
+    def expire(self, slot):
+        request = self.slots.get(slot)
+        if request is None:
+            return
+        command = request["command"]
+        retries = self.retries if command.retries is None else command.retries
+        if request["attempt"] < retries and not request["future"].done():
+            request["attempt"] += 1
+            self.writer.write(command.bytes)
+            request["deadline"] = asyncio.get_running_loop().call_later(
+                command.timeout * self.backoff ** request["attempt"], self.expire, slot)
+            return
+        del self.slots[slot]
+        self.ids.release(slot)
+        if not request["future"].done():
+            request["future"].set_exception(asyncio.TimeoutError(f"{command.label} timed out"))
+        self.drain()
+
+    def register_reply(self, line):
+        try:
+            reply = TachyReply.from_line(line)
+        except (ValueError, UnicodeDecodeError):
+            reply = None
+        request = None
+        if isinstance(reply, GeoCOMReply):
+            request = self.slots.pop(reply.get_transaction_id(), None)
+        if request is None:
+            if self.on_unsolicited:
+                self.on_unsolicited(str(line, 'ascii', 'replace'))
+            return
+        request["deadline"].cancel()
+        self.ids.release(reply.get_transaction_id())
+        if not request["future"].done():
+            request["future"].set_result(reply)
+        self.drain()
+
+    async def read_replies(self):
+        try:
+            while True:
+                data = await self.reader.read(READ_SIZE)
+                if not data:
+                    break
+                self.framer.feed(data)
+                for line in self.framer.frames():
+                    self.register_reply(line)
+        finally:
+            self.fail_all(ConnectionError("Connection to the instrument was lost."))
+
+    def fail_all(self, error):
+        for slot, request in list(self.slots.items()):
+            request["deadline"].cancel()
+            self.ids.release(slot)
+            if not request["future"].done():
+                request["future"].set_exception(error)
+        self.slots.clear()
+        while self.pending:
+            command, future = self.pending.popleft()
+            if not future.done():
+                future.set_exception(error)
+
+    def in_flight(self):
+        return len(self.slots)
+
+    async def close(self):
+        self.reader_task.cancel()
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+        try:
+            await self.reader_task
+        except asyncio.CancelledError:
+            pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+
+async def open_connection(host, port, **kwargs):
+    """Connects to an instrument behind a TCP serial bridge (ser2net, radio modems...)."""
+    reader, writer = await asyncio.open_connection(host, port)
+    return GeoCOMClient(reader, writer, **kwargs)
+
+
+async def open_serial_connection(port_name, baudrate=19200, **kwargs):
+    """Opens a local serial port, requires the pyserial-asyncio package."""
+    import serial_asyncio
+    reader, writer = await serial_asyncio.open_serial_connection(url=port_name, baudrate=baudrate)
+    return GeoCOMClient(reader, writer, **kwargs)
+
+
+if __name__ == "__main__":
+    import sys
+    from .TachyRequest import CSV_GetInstrumentName
+
+    async def identify(host, port):
+        async with await open_connection(host, int(port)) as client:
+            print(await client.request(CSV_GetInstrumentName()))
+
+    asyncio.run(identify(*sys.argv[1:3]))
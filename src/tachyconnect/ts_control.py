@@ -1,5 +1,8 @@
-from time import time, sleep
+import sys
+from time import sleep, monotonic
+from math import ceil, log10, pi
 from enum import Enum
+from collections import deque
 from xml.etree.ElementTree import PI
 
 from PyQt5.QtSerialPort import QSerialPort, QSerialPortInfo
@@ -18,6 +21,10 @@ class CommunicationConstants:
 
     GSI_REPLY_PREFIXES = ["?", "*"]
 
+    # fastest first, like the COM_BAUD_RATE enumeration
+    BAUD_RATES = [int(rate.name.rsplit('_', 1)[1]) for rate in gc_constants.COM_BAUD_RATE]
+    DEFAULT_BAUD_RATE = 19200
+
     class ImplementationStates(Enum):
         NOT_YET_DETECTED = 0
         NOT_IMPLEMENTED = 1
@@ -33,6 +40,9 @@ class TachyCommand(QObject):
     MESSAGE_PREFIX = ""
     REPLY_PREFIX = ""
     protocol = None
+    timeout = 2  # seconds until the queue gives up on a reply
+    retries = None  # None uses the queue's setting
+    precision = None  # decimals of doubles in the reply, None if unknown
 
     def __init__(self, command: str, label = None, args = []):
         super().__init__()
@@ -93,10 +103,99 @@ class GeoCOMCommand(TachyCommand):
         return message.encode('ascii')
 
 
+CRLF_BYTES = gc_constants.CRLF.encode('ascii')
+
+
+def encode_args(args):
+    if not args:
+        return b""
+    return ",".join(map(str, args)).encode('ascii')
+
+
+class GeoCOMTemplate:
+    """Encodes requests for one geoCOM RPC without building QObjects.
+
+    The "%R1Q,<code>," prefix is encoded once per template and request()
+    only encodes the arguments. The TemplateCommand it returns is accepted
+    by MessageQueue, Dispatcher and GeoCOMClient like a GeoCOMCommand.
+    """
+    __slots__ = ("command", "label", "prefix", "timeout", "retries")
+
+    def __init__(self, command, label=None, timeout=TachyCommand.timeout, retries=None):
+        self.command = str(command)
+        self.label = self.command if label is None else label
+        self.prefix = f"{GeoCOMCommand.MESSAGE_PREFIX},{self.command},".encode('ascii')
+        self.timeout = timeout
+        self.retries = retries
+
+    def request(self, *args, timeout=None):
+        return TemplateCommand(self, encode_args(args), timeout)
+
+
+class TemplateCommand:
+    """One request made by a GeoCOMTemplate, only the transaction id is filled in on sending."""
+    __slots__ = ("template", "payload", "timeout", "retries", "transaction_id", "precision")
+    protocol = CommunicationConstants.GEOCOM
+
+    def __init__(self, template, payload, timeout=None):
+        self.template = template
+        self.payload = payload
+        self.timeout = template.timeout if timeout is None else timeout
+        self.retries = template.retries
+        self.transaction_id = 0
+        self.precision = None
+
+    @property
+    def label(self):
+        return self.template.label
+
+    @property
+    def command(self):
+        return self.template.command
+
+    @property
+    def args(self):
+        return self.payload.decode('ascii').split(",") if self.payload else []
+
+    @property
+    def bytes(self):
+        return b"".join((self.template.prefix, b"%d" % self.transaction_id, b":", self.payload, CRLF_BYTES))
+
+    def set_transaction_id(self, id: int):
+        self.transaction_id = id
+
+    def get_transaction_id(self) -> int:
+        return self.transaction_id
+
+    def get_protocol(self):
+        return self.protocol
+
+    def __str__(self):
+        return f"{self.protocol}: {self.command}, {str(self.args)}"
+
+
 class TachyReply:
-    def __init__(self, bites: bytes):
-        self.bites = bites
-        self.ascii = bites.data().decode('ascii')
+    protocol = None
+
+    def __init__(self, bites):
+        # bites may be a QByteArray or a view into the framer's buffer, which
+        # must not be kept, so the line is decoded right away and only once.
+        if not isinstance(bites, (bytes, bytearray, memoryview)):
+            bites = bytes(bites)
+        self.ascii = str(bites, 'ascii').rstrip(gc_constants.CRLF)
+
+    @staticmethod
+    def from_line(line):
+        """Creates the reply type that matches the prefix of line."""
+        if line[:4] == GeoCOMReply.PREFIX_BYTES or line[:5] == b"@W127":
+            return GeoCOMReply(line)
+        if line[:1] in (b"?", b"*"):
+            return GSIReply(line)
+        raise ValueError(f"Tachymeter reply uses unknown protocoll: {str(line, 'ascii', 'replace')}")
+
+    @property
+    def bites(self):
+        return self.ascii.encode('ascii')
 
     def __str__(self):
         return self.ascii
@@ -105,9 +204,9 @@ class TachyReply:
         raise ValueError("This base type is not supposed to have an id.")
 
     def get_protocol(self):
-        if self.ascii[0] in CommunicationConstants.GSI_REPLY_PREFIXES:
+        if self.ascii[:1] in CommunicationConstants.GSI_REPLY_PREFIXES:
             return CommunicationConstants.GSI
-        if self.ascii.startswith(CommunicationConstants.GEOCOM_REPLY_PREFIX) or self.ascii[:4] == "@W127":
+        if self.ascii.startswith(CommunicationConstants.GEOCOM_REPLY_PREFIX) or self.ascii[:5] == "@W127":
             return CommunicationConstants.GEOCOM
         raise ValueError(f"Tachymeter reply uses unknown protocoll: {self.ascii}")
 
@@ -119,9 +218,18 @@ class TachyReply:
 
 
 class GSIReply(TachyReply):
+    protocol = CommunicationConstants.GSI
+
+    def __init__(self, bites):
+        super().__init__(bites)
+        self.result = None
+
     @property
     def PREFIX(self):
-        self.ascii[0]
+        return self.ascii[0]
+
+    def get_protocol(self):
+        return self.protocol
 
     def get_transaction_id(self):
         return 1
@@ -130,64 +238,441 @@ class GSIReply(TachyReply):
         return self.ascii.startswith(GSI_Parser.REPLY_ACK)
 
     def get_result(self):
-        return GSI_Parser.parse(self.ascii)
+        if self.result is None:
+            self.result = GSI_Parser.parse(self.ascii)
+        return self.result
 
 
 class GeoCOMReply(TachyReply):
     PREFIX = CommunicationConstants.GEOCOM_REPLY_PREFIX
+    PREFIX_BYTES = PREFIX.encode('ascii')
+    protocol = CommunicationConstants.GEOCOM
+    # digits right of the decimal point the instrument sent doubles with, set
+    # from the request by the message queue. None means the setting is unknown.
+    precision = None
+
+    def __init__(self, bites):
+        super().__init__(bites)
+        header, _, payload = self.ascii.partition(':')
+        segments = header.split(",")
+        try:
+            self.transaction_id = int(segments[2])
+        except (IndexError, ValueError):
+            self.transaction_id = None
+        self.results = payload.strip().split(",")
+
+    def get_protocol(self):
+        return self.protocol
 
     def get_transaction_id(self):
-        header = self.ascii.split(':')[0]
-        segments = header.split(",")
-        return int(segments[2])
+        return self.transaction_id
 
     def success(self):
         return self.ascii.startswith(GeoCOMReply.PREFIX)
 
     def get_result(self):
-        payload = self.ascii.split(':')[1].strip()
-        return payload.split(",")
+        return list(self.results)
+
+
+class LineFramer:
+    """Collects serial data in one reusable buffer and cuts it into lines.
+
+    frames() yields memoryview slices of the buffer without the line
+    terminator. A view is only valid until the generator resumes, so
+    consumers have to copy or parse it right away. feed() cannot resize the
+    buffer before the generator is exhausted or closed, so do not run code
+    that may read the port again while iterating. Data that exceeds
+    max_size without a line break is handed out as one line."""
+
+    def __init__(self, max_size=1 << 16):
+        self.buffer = bytearray()
+        self.max_size = max_size
+
+    def feed(self, data):
+        self.buffer.extend(data)
+
+    def frames(self):
+        buffer = self.buffer
+        start = 0
+        try:
+            with memoryview(buffer) as view:
+                end = buffer.find(b"\n")
+                while end >= 0:
+                    line_start, start = start, end + 1
+                    stop = end - 1 if end > line_start and buffer[end - 1] == 13 else end
+                    if stop > line_start:
+                        with view[line_start:stop] as line:
+                            yield line
+                    end = buffer.find(b"\n", start)
+                if len(buffer) - start > self.max_size:
+                    line_start, start = start, len(buffer)
+                    with view[line_start:] as line:
+                        yield line
+        finally:
+            del buffer[:start]
+
+    def clear(self):
+        self.buffer.clear()
+
+    def __len__(self):
+        return len(self.buffer)
+
+
+class PrecisionPolicy:
+    """Decimals to transmit doubles with, derived from the resolution a session needs.
+
+    GeoCOM sends lengths in metres and angles in radians and
+    COM_SetDoublePrecision applies to all doubles alike, so the policy asks
+    for the digits its finest quantity needs:
+
+        PrecisionPolicy(length=0.001, angle=0.1 * MGON)  # mm, 0.1 mgon -> 6 digits
+    """
+    DEFAULT_DIGITS = 15  # the instrument's setting after power up
+
+    def __init__(self, length=None, angle=None):
+        self.length = length  # m
+        self.angle = angle  # rad
+
+    @property
+    def digits(self):
+        resolutions = [resolution for resolution in (self.length, self.angle) if resolution]
+        if not resolutions:
+            return self.DEFAULT_DIGITS
+        digits = max(ceil(round(-log10(resolution), 9)) for resolution in resolutions)
+        return max(0, min(digits, self.DEFAULT_DIGITS))
+
+    def __str__(self):
+        return f"{self.digits} digits (length {self.length} m, angle {self.angle} rad)"
+
+
+GON = pi / 200
+MGON = GON / 1000
+
+
+class TimerWheel:
+    """Hashed timer wheel that expires any number of deadlines with one clock.
+
+    Deadlines are rounded up to whole ticks. advance() has to be called at
+    least once per tick and returns the keys whose deadlines have passed."""
+
+    def __init__(self, tick=0.05, n_buckets=256, clock=monotonic):
+        self.tick = tick
+        self.clock = clock
+        self.buckets = [{} for _ in range(n_buckets)]
+        self.location = {}
+        self.cursor = 0
+        self.last_tick = clock()
+
+    def schedule(self, key, delay):
+        self.cancel(key)
+        now = self.clock()
+        if not self.location:
+            self.last_tick = now
+        # ticks count from the last tick, the time passed since then must not shorten the delay,
+        # and the epsilon keeps e.g. 1.0 / 0.05 from rounding up to 21 ticks
+        ticks = max(1, ceil((delay + now - self.last_tick) / self.tick - 1e-9))
+        n_buckets = len(self.buckets)
+        index = (self.cursor + ticks) % n_buckets
+        self.buckets[index][key] = (ticks - 1) // n_buckets
+        self.location[key] = index
+
+    def cancel(self, key):
+        index = self.location.pop(key, None)
+        if index is not None:
+            del self.buckets[index][key]
+
+    def advance(self):
+        expired = []
+        now = self.clock()
+        while now - self.last_tick >= self.tick - 1e-9:
+            self.last_tick += self.tick
+            self.cursor = (self.cursor + 1) % len(self.buckets)
+            bucket = self.buckets[self.cursor]
+            for key, rounds in list(bucket.items()):
+                if rounds:
+                    bucket[key] = rounds - 1
+                else:
+                    del bucket[key]
+                    del self.location[key]
+                    expired.append(key)
+        return expired
+
+    def __len__(self):
+        return len(self.location)
+
+
+class PendingReply(QObject):
+    """Stands in for the reply to one request until it arrives.
+
+    resolved carries the reply, failed the exception if the request timed
+    out or could not be sent. Callables passed to add_done_callback get the
+    PendingReply itself. Evaluates to False if the request was not accepted
+    for sending, which is what Dispatcher.send used to return."""
+    resolved = pyqtSignal(object)
+    failed = pyqtSignal(object)
+
+    def __init__(self, command=None):
+        super().__init__()
+        self.command = command
+        self.reply = None
+        self.error = None
+        self.accepted = True
+        self.callbacks = []
+
+    def done(self):
+        return self.reply is not None or self.error is not None
+
+    def result(self):
+        """Returns the reply, None while waiting, or raises the error."""
+        if self.error is not None:
+            raise self.error
+        return self.reply
+
+    def exception(self):
+        return self.error
+
+    def add_done_callback(self, callback):
+        if self.done():
+            callback(self)
+        else:
+            self.callbacks.append(callback)
+
+    def set_result(self, reply):
+        if self.done():
+            return
+        self.reply = reply
+        self.resolved.emit(reply)
+        self.run_callbacks()
+
+    def set_exception(self, error):
+        if self.done():
+            return
+        self.error = error
+        self.failed.emit(error)
+        self.run_callbacks()
+
+    def run_callbacks(self):
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                # reported like an error in a Qt slot, the other callbacks and the reply handler still run
+                sys.excepthook(*sys.exc_info())
+
+    def wait(self, timeout=None):
+        """Runs a local event loop until the reply is in, returns result()."""
+        if not self.done():
+            loop = QEventLoop()
+            self.add_done_callback(lambda _: loop.quit())
+            if timeout is not None:
+                QTimer.singleShot(int(timeout * 1000), loop.quit)
+            loop.exec_()
+        return self.result()
+
+    def __bool__(self):
+        return self.accepted
+
+    @classmethod
+    def gather(cls, *pending_replies):
+        """Returns a PendingReply resolved with the list of all replies, in order.
+
+        It fails with the first error of any of the requests."""
+        gathered = cls()
+        remaining = [len(pending_replies)]
+
+        def collect(pending_reply):
+            if pending_reply.error is not None:
+                gathered.set_exception(pending_reply.error)
+                return
+            remaining[0] -= 1
+            if not remaining[0]:
+                gathered.set_result([p.reply for p in pending_replies])
+
+        if not pending_replies:
+            gathered.set_result([])
+        for pending_reply in pending_replies:
+            pending_reply.add_done_callback(collect)
+        return gathered
+
+
+class TransactionIds:
+    """Free list of transaction ids with O(1) acquire and release.
+
+    Released ids go to the back of the list, so an id is reused as late as
+    possible, which keeps late replies from being matched to new requests."""
+
+    def __init__(self, n_ids=7, first=1):
+        self.first = first
+        self.last = first + n_ids - 1
+        self.free = deque(range(first, self.last + 1))
+        self.used = bytearray(self.last + 1)
+
+    def acquire(self):
+        if not self.free:
+            return False
+        transaction_id = self.free.popleft()
+        self.used[transaction_id] = 1
+        return transaction_id
+
+    def release(self, transaction_id):
+        if self.first <= transaction_id <= self.last and self.used[transaction_id]:
+            self.used[transaction_id] = 0
+            self.free.append(transaction_id)
+            return True
+        return False
+
+    def __contains__(self, transaction_id):
+        return self.first <= transaction_id <= self.last and bool(self.used[transaction_id])
+
+    def __len__(self):
+        return len(self.free)
 
 
 class MessageQueue(QObject):
+    """Keeps track of requests that wait for their reply.
+
+    At most `window` requests are in flight at any time, each one keyed by
+    its transaction id in `slots`. Requests exceeding the window wait in the
+    `pending` FIFO and are sent as soon as a reply frees a slot.
+
+    Every request has a deadline of `timeout` seconds. Expired requests are
+    sent again up to `retries` times, each attempt waiting `backoff` times
+    longer than the one before. After that the slot is freed and
+    `timed_out` carries the original request.
+
+    A PendingReply passed along with a request is resolved with its reply
+    or failed with a TimeoutError.
+
+    Requests and replies are timestamped and recorded in `metrics` if it is
+    a Metrics.Metrics instance.
+    """
+    PENDING = -1
+    TICK = 50  # ms, resolution of the request deadlines
     non_requested_data = pyqtSignal(str)
-    def __init__(self, n_slots=7):
+    timed_out = pyqtSignal(object)
+
+    def __init__(self, n_slots=7, window=None, max_pending=1024, retries=0, backoff=2.0):
         super().__init__()
-        self.indices = list(range(1, n_slots + 1))
+        self.n_slots = n_slots
+        self.ids = TransactionIds(n_slots)
+        self.window = n_slots if window is None else max(1, min(window, n_slots))
+        self.max_pending = max_pending
+        self.retries = retries
+        self.backoff = backoff
         self.slots = {}
-        self.serial = QSerialPort
+        self.pending = deque()
+        self.serial = None
+        self.metrics = None
+        self.deadlines = TimerWheel(self.TICK / 1000)
+        self.deadline_timer = QTimer(self)
+        self.deadline_timer.setInterval(self.TICK)
+        self.deadline_timer.timeout.connect(self.expire)
 
     def set_serial(self, serial):
         self.serial = serial
+        self.drain()
 
-    def append(self, msg: TachyCommand):
-        def first_free_slot():
-            for i in self.indices:
-                if i not in self.slots.keys():
-                    return i
-            return False
+    def append(self, msg: TachyCommand, future: PendingReply = None):
+        """Send msg or queue it if the window is full.
+
+        Returns the transaction id of a sent message, PENDING if the message
+        waits for a free slot and False if it had to be dropped."""
         if self.serial is None:
             return False
-        slot = first_free_slot()
-        if slot and self.serial:
-            self.slots[slot] = {"message": msg.label}
+        queued = self.metrics.clock() if self.metrics is not None else None
+        if len(self.slots) < self.window and not self.pending:
+            return self.transmit(msg, future, queued)
+        if self.max_pending is not None and len(self.pending) >= self.max_pending:
+            return False
+        self.pending.append((msg, future, queued))
+        return self.PENDING
+
+    def transmit(self, msg: TachyCommand, future: PendingReply = None, queued=None):
+        slot = self.ids.acquire()
+        if slot:
+            self.slots[slot] = {"message": msg.label, "command": msg, "attempt": 0, "future": future}
             msg.set_transaction_id(slot)
+            if self.metrics is not None:
+                request = self.slots[slot]
+                request["sent"] = self.metrics.clock()
+                request["queued"] = request["sent"] if queued is None else queued
+                self.metrics.record_send(request["message"])
             self.serial.write(msg.bytes)
+            self.deadlines.schedule(slot, msg.timeout)
+            if not self.deadline_timer.isActive():
+                self.deadline_timer.start()
         return slot
 
+    def expire(self):
+        for slot in self.deadlines.advance():
+            request = self.slots.get(slot)
+            if request is None:
+                continue
+            msg = request["command"]
+            retries = self.retries if msg.retries is None else msg.retries
+            if request["attempt"] < retries and self.serial is not None:
+                request["attempt"] += 1
+                self.serial.write(msg.bytes)
+                if self.metrics is not None:
+                    self.metrics.record_retry(msg.label)
+                self.deadlines.schedule(slot, msg.timeout * self.backoff ** request["attempt"])
+            else:
+                del self.slots[slot]
+                self.ids.release(slot)
+                if request["future"] is not None:
+                    request["future"].set_exception(TimeoutError(f"{msg.label} timed out after {msg.timeout} s"))
+                if self.metrics is not None:
+                    self.metrics.record_timeout(msg.label)
+                self.timed_out.emit(msg)
+        self.drain()
+        if not len(self.deadlines):
+            self.deadline_timer.stop()
+
+    def drain(self):
+        while self.pending and self.serial is not None and len(self.slots) < self.window:
+            self.transmit(*self.pending.popleft())
+
+    def in_flight(self):
+        return len(self.slots)
+
     def register_reply(self, reply: TachyReply):
         message_id = reply.get_transaction_id()
         try:
             request = self.slots.pop(message_id)
-            return request, reply
         except KeyError:
+            if self.metrics is not None:
+                self.metrics.record_unsolicited()
             self.non_requested_data.emit(reply.ascii)
+            return
+        if self.metrics is not None and "sent" in request:
+            self.metrics.record_reply(request["message"], request["queued"], request["sent"], self.metrics.clock())
+        self.ids.release(message_id)
+        self.deadlines.cancel(message_id)
+        self.drain()
+        reply.precision = request["command"].precision
+        if request["future"] is not None:
+            request["future"].set_result(reply)
+        return request, reply
 
     def close(self):
-        self.serial.close()
+        error = ConnectionError("Message queue was closed.")
+        for msg, future, queued in self.pending:
+            if future is not None:
+                future.set_exception(error)
+        for request in self.slots.values():
+            if request["future"] is not None:
+                request["future"].set_exception(error)
+        self.pending.clear()
+        self.slots.clear()
+        self.ids = TransactionIds(self.n_slots)
+        self.deadlines = TimerWheel(self.TICK / 1000)
+        self.deadline_timer.stop()
+        if self.serial is not None:
+            self.serial.close()
 
     def __str__(self):
-        n_slots = self.indices[-1]
+        n_slots = self.n_slots
         return f"Message queue with {n_slots} slot{'s' if n_slots > 1 else ''}"
 
 
@@ -197,22 +682,46 @@ class Dispatcher(QThread):
     serial_connected = pyqtSignal(str, str)
     log = pyqtSignal(str)
     non_requested_data = pyqtSignal(str)
+    timed_out = pyqtSignal(object)
     SERIAL_CONNECTED = '🔗'
     NO_SERIAL_AVAILABLE = '⚠️'
 
-    def __init__(self, gsi_queue: MessageQueue, geocom_queue: MessageQueue, reply_handler, parent = None):
+    def __init__(self, gsi_queue: MessageQueue, geocom_queue: MessageQueue, reply_handler, parent = None,
+                 event_driven = False, port_cache = None, auto_baud = False, metrics = None):
         super(self.__class__, self).__init__(parent)
+        # Polling reads the port every pollingInterval ms, event driven reading
+        # handles replies as soon as the serial port signals readyRead.
+        self.event_driven = event_driven
+        self.listening = False
         self.pollingTimer = QTimer(self)
         self.pollingTimer.timeout.connect(self.poll)
         self.serial = QSerialPort()
+        self.serial.errorOccurred.connect(self.check_connection)
+        self.serial_port = self.serial  # self.serial is another device after attach()
+        self.framer = LineFramer()
         self.loop = QEventLoop()
         self.queues = {CommunicationConstants.GSI: gsi_queue,
                        CommunicationConstants.GEOCOM: geocom_queue}
         self.reply_types = {CommunicationConstants.GSI: GSIReply,
                             CommunicationConstants.GEOCOM: GeoCOMReply}
         self.reply_handler = reply_handler
+        # decimals the instrument sends doubles with, as of the last COM_SetDoublePrecision sent
+        self.double_precision = None
+        self.precision_policy = None
+        # remembers where instruments were found, None disables the cache
+        self.port_cache = port_cache
+        # hook_up tries every baud rate in CommunicationConstants.BAUD_RATES instead of Qt's default only
+        self.auto_baud = auto_baud
+        self.set_metrics(metrics)
         for queue in self.queues.values():
             queue.non_requested_data.connect(self.emit_non_requested_data)
+            queue.timed_out.connect(self.timed_out)
+
+    def set_metrics(self, metrics):
+        """Records latencies and counters of all queues in a Metrics instance, None switches recording off."""
+        self.metrics = metrics
+        for queue in self.queues.values():
+            queue.metrics = metrics
 
     def emit_non_requested_data(self, data):
         self.non_requested_data.emit(data)
@@ -226,105 +735,359 @@ class Dispatcher(QThread):
             self.serial_disconnected.emit(self.NO_SERIAL_AVAILABLE, port_name)
             self.loop.quit()
             return
-        port_names = [port.portName() for port in QSerialPortInfo.availablePorts()]
-        port_names.reverse()
-        def moin():
-            if port_names:
-                ping = Ping(port_names.pop(), 500)
-                ping.timed_out.connect(moin)
-                ping.found_tachy.connect(self.set_serial_port)
-                ping.fire()
-        moin()
+        port_infos = QSerialPortInfo.availablePorts()
+        port_names = [port.portName() for port in port_infos]
+        known = self.port_cache.lookup(port_infos) if self.port_cache is not None else []
+        if known:
+            # one ping to the ports the instrument was last seen on, the full scan only if that fails
+            known_names = [port_info.portName() for port_info, entry in known]
+            cached_rates = {port_info.portName(): entry.get("baud_rate") for port_info, entry in known}
+            for port_info, entry in known:
+                self.log.emit(f"Trying {entry.get('instrument_name') or 'instrument'} "
+                              f"on {port_info.portName()} from the port cache")
+            self.scan_ports(known_names, cached_rates,
+                            fall_back=[port_name for port_name in port_names if port_name not in known_names])
+        else:
+            self.scan_ports(port_names)
+
+    def baud_candidates(self, cached_rate=None):
+        """Baud rates to ping a port at: the cached one, then the instrument default, then fastest first."""
+        if not self.auto_baud:
+            return cached_rate
+        default = CommunicationConstants.DEFAULT_BAUD_RATE
+        rates = [default] + [rate for rate in CommunicationConstants.BAUD_RATES if rate != default]
+        if cached_rate in rates:
+            rates.remove(cached_rate)
+            rates.insert(0, cached_rate)
+        return rates
+
+    def scan_ports(self, port_names, cached_rates=None, fall_back=None):
+        cached_rates = cached_rates or {}
+        baud_rates = {port_name: self.baud_candidates(cached_rates.get(port_name)) for port_name in port_names}
+        self.scan = PortScan(port_names, 500, self, baud_rates)
+        self.scan.found.connect(self.instrument_found)
+        if fall_back:
+            self.scan.nothing_found.connect(lambda: self.scan_ports(fall_back))
+        else:
+            self.scan.nothing_found.connect(lambda: self.log.emit("No instrument found"))
+        self.scan.start()
+
+    def instrument_found(self, port_name):
+        self.open_port(port_name, self.scan.baud_rate)
+        if self.auto_baud:
+            self.verify_link()
+        if self.port_cache is not None:
+            self.remember_port()
+        self.start()
 
-    def start(self):
-        self.pollingTimer.start(self.pollingInterval)
+    def verify_link(self):
+        """Checks the link at the current baud rate with COM_NullProc, returns the PendingReply."""
+        baud_rate = self.serial.baudRate()
+        pending_reply = self.send(GeoCOMCommand(str(gc_constants.COM_NullProc), "COM_NullProc"))
+        pending_reply.resolved.connect(lambda reply: self.log.emit(f"Link checked at {baud_rate} baud"))
+        pending_reply.failed.connect(lambda error: self.log.emit(f"Link check at {baud_rate} baud failed: {error}"))
+        return pending_reply
+
+    def set_double_precision(self, digits):
+        """Sends COM_SetDoublePrecision, replies to requests sent afterwards carry digits as precision."""
+        command = GeoCOMCommand(str(gc_constants.COM_SetDoublePrecision), "COM_SetDoublePrecision", digits)
+        pending_reply = self.send(command)
+        if pending_reply:
+            self.double_precision = digits
+        return pending_reply
+
+    def precision_burst(self, requests, policy=None):
+        """Sends requests with the precision of policy and restores the previous precision afterwards.
+
+        requests are TachyRequests or geoCOM commands, policy defaults to
+        precision_policy. The instrument handles requests in the order they
+        arrive, so the burst is pipelined between COM_GetDoublePrecision,
+        COM_SetDoublePrecision and the restoring COM_SetDoublePrecision.
+        Returns a PendingReply that resolves with the list of replies."""
+        policy = policy or self.precision_policy or PrecisionPolicy()
+        previous = self.send(GeoCOMCommand(str(gc_constants.COM_GetDoublePrecision), "COM_GetDoublePrecision"))
+        self.set_double_precision(policy.digits)
+        burst = PendingReply.gather(*(self.send(request.get_geocom_command()
+                                                if hasattr(request, "get_geocom_command") else request)
+                                      for request in requests))
+
+        def restore(burst):
+            results = previous.reply.get_result() if previous.done() and previous.error is None else []
+            if results[:1] == [str(gc_constants.GRC_OK)] and results[-1].isdigit():
+                self.set_double_precision(int(results[-1]))
+            else:
+                self.set_double_precision(PrecisionPolicy.DEFAULT_DIGITS)
+
+        burst.add_done_callback(restore)
+        return burst
+
+    def remember_port(self):
+        """Stores the open port in the port cache and completes it with the instrument name."""
+        port_info = QSerialPortInfo(self.serial)
+        port_name = self.serial.portName()
+        baud_rate = self.serial.baudRate()
+        protocol = CommunicationConstants.ImplementationStates.GEOCOM
+        self.port_cache.remember(port_info, baud_rate, protocol, port_name=port_name)
+        pending_reply = self.send(GeoCOMCommand(str(gc_constants.CSV_GetInstrumentName), "CSV_GetInstrumentName"))
+        pending_reply.resolved.connect(
+            lambda reply: self.port_cache.remember(port_info, baud_rate, protocol, reply.get_result()[-1].strip('"'),
+                                                   port_name)
+            if reply.get_result()[0] == str(gc_constants.GRC_OK) else None)
+
+    def listen(self):
+        """Start reading replies without entering a local event loop."""
+        if not self.listening:
+            if self.event_driven:
+                self.serial.readyRead.connect(self.read_replies)
+            else:
+                self.pollingTimer.start(self.pollingInterval)
+            self.listening = True
         self.serial_connected.emit(self.SERIAL_CONNECTED, self.serial.portName())
-        self.log.emit("Started listening.")
+        self.log.emit(f"Started listening{' (event driven)' if self.event_driven else ''}.")
+
+    def start(self):
+        self.listen()
         self.loop = QEventLoop()
         self.loop.exec_()
 
     def stop(self):
         self.pollingTimer.stop()
+        if self.listening and self.event_driven:
+            self.serial.readyRead.disconnect(self.read_replies)
+        self.listening = False
 
     def send_log(self, *args):
         self.log.emit(str(args))
 
     def set_serial_port(self, port_name):
+        self.open_port(port_name)
+        self.start()
+
+    def open_port(self, port_name, baud_rate=None):
+        """Opens port_name and connects the queues to it, returns whether that worked."""
         if self.serial.isOpen():
             self.serial.close()
+        if self.serial is not self.serial_port:
+            self.stop()
+            self.serial = self.serial_port
+        self.framer.clear()
         self.serial.setPortName(port_name)
-        self.serial.open(QSerialPort.ReadWrite)
+        is_open = self.serial.open(QSerialPort.ReadWrite)
+        if is_open and baud_rate:
+            self.serial.setBaudRate(baud_rate)
         for queue in self.queues.values():
             self.log.emit(f"Connecting {str(queue)} to {self.serial.portName()}")
             queue.set_serial(self.serial)
-        self.start()
+        return is_open
 
-    def poll(self):
+    def attach(self, device):
+        """Talks through an open QIODevice, e.g. a Simulator.SimulatedPort, instead of the serial port.
+
+        Call listen() afterwards. Returns whether the device is open."""
+        self.stop()
+        if self.serial.isOpen():
+            self.serial.close()
+        self.serial = device
+        self.framer.clear()
+        for queue in self.queues.values():
+            self.log.emit(f"Connecting {str(queue)} to {device.portName()}")
+            queue.set_serial(device)
+        return device.isOpen()
+
+    def check_connection(self, *args):
         if self.serial.error() == QSerialPort.ResourceError:  # device is unexpectedly removed from the system
+            self.stop()
             self.serial.close()
-            self.serial_disconnected.emit(f"Connection {self.serial.portName} failed", self.serial.portName())
-        while self.serial.canReadLine():
-            reply = TachyReply(self.serial.readLine())
+            self.serial.clearError()
+            self.serial_disconnected.emit(f"Connection {self.serial.portName()} failed", self.serial.portName())
+
+    def poll(self):
+        self.check_connection()
+        self.read_replies()
+
+    def read_replies(self):
+        self.framer.feed(self.serial.readAll())
+        # Decode every complete line before dispatching any of them. Reply
+        # callbacks may wait for other replies and thereby call read_replies
+        # again, which can only feed the framer once frames() has finished.
+        replies = []
+        for line in self.framer.frames():
+            try:
+                replies.append(TachyReply.from_line(line))
+            except (ValueError, UnicodeDecodeError):
+                replies.append(bytes(line))
+        for reply in replies:
             self.register_reply(reply)
-        else:
-            pass
 
     def send(self, message: TachyCommand):
-        queue = self.queues[message.protocol]
-        success = queue.append(message)
-        return bool(success)
+        """Queues message and returns a PendingReply for its answer.
 
-    def register_reply(self, reply: TachyReply):
-        protocol = reply.get_protocol()
-        reply_type = self.reply_types[protocol]
-        queue = self.queues[protocol]
-        try:
-            self.reply_handler.handle(*queue.register_reply(reply_type(reply.bites)))
-        except TypeError:
-            """TypeErrors usually stem from incoming data that can not be
-            associated with any request. These are handled by the 'non_requested_data'
-            signal."""
-            pass
+        The PendingReply evaluates to False if the message was dropped
+        because no port is connected or too many requests are waiting."""
+        queue = self.queues[message.protocol]
+        if message.protocol == CommunicationConstants.GEOCOM and message.precision is None:
+            message.precision = self.double_precision
+        pending_reply = PendingReply(message)
+        if not queue.append(message, pending_reply):
+            pending_reply.accepted = False
+            if queue.serial is None:
+                pending_reply.set_exception(ConnectionError(f"Not connected, dropped {message.label}"))
+            else:
+                pending_reply.set_exception(BufferError(f"Too many requests waiting, dropped {message.label}"))
+        return pending_reply
+
+    def post(self, message):
+        """Queues message without a PendingReply, its reply only goes to the reply handler.
+
+        Returns the transaction id, MessageQueue.PENDING or False if the
+        message was dropped."""
+        if message.protocol == CommunicationConstants.GEOCOM and message.precision is None:
+            message.precision = self.double_precision
+        return self.queues[message.protocol].append(message)
+
+    def register_reply(self, reply):
+        """Takes a framed line or a TachyReply and hands it to its queue."""
+        if not isinstance(reply, TachyReply):
+            try:
+                reply = TachyReply.from_line(reply)
+            except (ValueError, UnicodeDecodeError):
+                if self.metrics is not None:
+                    self.metrics.record_unsolicited()
+                self.non_requested_data.emit(str(reply, 'ascii', 'replace'))
+                return
+        elif reply.protocol is None:
+            reply = self.reply_types[reply.get_protocol()](reply.bites)
+        # None for data that answers no request, the queue emits non_requested_data for it
+        result = self.queues[reply.protocol].register_reply(reply)
+        if result is not None:
+            self.reply_handler.handle(*result)
 
 class Ping(QThread):
     found_tachy = pyqtSignal(str)
     found_something = pyqtSignal(str)
     timed_out = pyqtSignal(str)
     pinging = pyqtSignal(str)
+    MESSAGE = f"{GeoCOMCommand.MESSAGE_PREFIX},{str(gc_constants.BMM_BeepAlarm)},1:{gc_constants.CRLF}".encode('ascii')
 
-    def __init__(self, port_name, timeout=1200):
+    def __init__(self, port_name, timeout=1200, baud_rate=None):
         super().__init__()
         self.timeout = timeout
+        self.port_name = port_name
+        # a list of baud rates is tried in turn until the instrument answers at one of them
+        self.baud_rates = list(baud_rate) if isinstance(baud_rate, (list, tuple)) else [baud_rate]
+        self.baud_rate = None
+        self.ping_loop = None
+        self.finished = False
         self.serial = QSerialPort()
         self.serial.setPortName(port_name)
         self.is_open = self.serial.open(QSerialPort.ReadWrite)
         if not self.is_open:
             return
-        message = f"{GeoCOMCommand.MESSAGE_PREFIX},{str(gc_constants.BMM_BeepAlarm)},1:{gc_constants.CRLF}"
-        self.serial.writeData(message.encode('ascii'))
         self.timer = QTimer(self)
         self.timer.setSingleShot(True)
         self.timer.timeout.connect(self.read)
-        
+        self.next_baud_rate()
+
+    def next_baud_rate(self):
+        self.baud_rate = self.baud_rates.pop(0)
+        if self.baud_rate:
+            self.serial.setBaudRate(self.baud_rate)
+        self.serial.clear()
+        self.serial.writeData(self.MESSAGE)
+
     def fire(self):
         if self.is_open:
             self.timer.start(self.timeout)
             self.ping_loop = QEventLoop()
             self.ping_loop.exec_()
 
-    def read(self):
-        self.pinging.emit(f"Pinging {self.serial.portName()}")
+    def listen(self):
+        # like fire, but returns at once and evaluates the reply as soon as it arrives
+        if self.is_open:
+            self.serial.readyRead.connect(self.reply_arrived)
+            self.timer.start(self.timeout)
+
+    def reply_arrived(self):
         if self.serial.canReadLine():
-            reply = bytes(self.serial.readLine()).decode('ascii')
+            self.read()
+
+    def cancel(self):
+        if self.is_open and not self.finished:
+            self.finished = True
+            self.timer.stop()
             self.serial.close()
-            if reply.startswith(GeoCOMReply.PREFIX):
-                self.found_tachy.emit(self.serial.portName())
-            else:
-                self.found_something.emit(self.serial.portName())
-        else:
-            self.timed_out.emit(f"Ping timed out: {self.serial.portName()}")
 
+    def read(self):
+        if self.finished:
+            return
+        self.timer.stop()
+        self.pinging.emit(f"Pinging {self.serial.portName()} at {self.serial.baudRate()} baud")
+        reply = bytes(self.serial.readLine()).decode('ascii', 'replace') if self.serial.canReadLine() else None
+        if reply is not None and reply.startswith(GeoCOMReply.PREFIX):
+            signal, argument = self.found_tachy, self.port_name
+        elif self.baud_rates:
+            # garbage or silence, maybe the instrument listens at another rate
+            self.next_baud_rate()
+            self.timer.start(self.timeout)
+            return
+        elif reply is not None:
+            signal, argument = self.found_something, self.port_name
+        else:
+            signal, argument = self.timed_out, f"Ping timed out: {self.serial.portName()}"
+        self.finished = True
         self.serial.close()
-        self.ping_loop.quit()
+        signal.emit(argument)
+        if self.ping_loop is not None:
+            self.ping_loop.quit()
         self.quit()
 
+
+class PortScan(QObject):
+    """Pings all candidate ports at once.
+
+    found is emitted with the port name of the first geoCOM answer, the
+    remaining pings are cancelled then. nothing_found follows once every
+    port has timed out or answered with something else.
+    """
+    found = pyqtSignal(str)
+    nothing_found = pyqtSignal()
+    pinging = pyqtSignal(str)
+
+    def __init__(self, port_names, timeout=500, parent=None, baud_rates=None):
+        super().__init__(parent)
+        self.port_names = list(port_names)
+        self.timeout = timeout
+        self.baud_rates = baud_rates or {}
+        self.pings = []
+        self.port_name = None
+        self.baud_rate = None
+
+    def start(self):
+        for port_name in self.port_names:
+            ping = Ping(port_name, self.timeout, self.baud_rates.get(port_name))
+            if not ping.is_open:
+                continue
+            ping.found_tachy.connect(lambda port_name, ping=ping: self.found_tachy(port_name, ping.baud_rate))
+            ping.found_something.connect(self.ping_finished)
+            ping.timed_out.connect(self.ping_finished)
+            ping.pinging.connect(self.pinging)
+            self.pings.append(ping)
+            ping.listen()
+        if not self.pings:
+            self.nothing_found.emit()
+
+    def found_tachy(self, port_name, baud_rate=None):
+        if self.port_name is not None:
+            return
+        self.port_name = port_name
+        self.baud_rate = baud_rate
+        self.cancel()
+        self.found.emit(port_name)
+
+    def ping_finished(self, *args):
+        if self.port_name is None and all(ping.finished for ping in self.pings):
+            self.nothing_found.emit()
+
+    def cancel(self):
+        for ping in self.pings:
+            ping.cancel()
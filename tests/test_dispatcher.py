@@ -0,0 +1,57 @@
+import sys
+
+from tachyconnect.ts_control import Dispatcher, MessageQueue
+from tachyconnect.ReplyHandler import ReplyHandler
+from tachyconnect.Simulator import SimulatedTotalStation, SimulatedPort
+from tachyconnect.TachyRequest import TMC_GetHeight, TMC_QuickDist
+
+
+def make_dispatcher(reply_handler=None):
+    dispatcher = Dispatcher(MessageQueue(1), MessageQueue(7), reply_handler or ReplyHandler(), event_driven=True)
+    dispatcher.attach(SimulatedPort(SimulatedTotalStation(latency=0.002)))
+    dispatcher.listen()
+    return dispatcher
+
+
+def test_wait_inside_reply_callback():
+    dispatcher = make_dispatcher()
+    nested = []
+    first = dispatcher.send(TMC_QuickDist.geocom_command())
+    first.add_done_callback(lambda pending_reply: nested.append(
+        dispatcher.send(TMC_GetHeight.geocom_command()).wait(2)))
+    assert first.wait(3) is not None
+    assert len(nested) == 1 and nested[0] is not None
+    assert len(dispatcher.framer) == 0
+
+
+class RecordingHandler(ReplyHandler):
+    def __init__(self):
+        super().__init__()
+        self.handled = []
+
+    def handle(self, request, reply):
+        self.handled.append(request["message"])
+        return True
+
+
+def test_callback_errors_are_not_swallowed(monkeypatch):
+    errors = []
+    monkeypatch.setattr(sys, "excepthook", lambda *exc_info: errors.append(exc_info[0]))
+    reply_handler = RecordingHandler()
+    dispatcher = make_dispatcher(reply_handler)
+    pending_reply = dispatcher.send(TMC_QuickDist.geocom_command())
+    pending_reply.add_done_callback(lambda pending_reply: None + 1)
+    pending_reply.wait(2)
+    assert pending_reply.done()
+    assert errors == [TypeError]
+    assert reply_handler.handled == ["TMC_QuickDist"]
+
+
+def test_unsolicited_reply():
+    reply_handler = RecordingHandler()
+    dispatcher = make_dispatcher(reply_handler)
+    unsolicited = []
+    dispatcher.non_requested_data.connect(unsolicited.append)
+    dispatcher.register_reply(b"%R1P,0,5:0")
+    assert unsolicited == ["%R1P,0,5:0"]
+    assert reply_handler.handled == []
@@ -0,0 +1,48 @@
+import io
+
+import pytest
+
+from tachyconnect import GSI_Parser
+
+np = pytest.importorskip("numpy")
+
+
+def test_parse_columns_reads_each_word_like_parse():
+    lines = ["*81..00+00000000000001e5 ", "*81..00+0000000000001000 ", "*81..00+000000000000abcd "]
+    column = GSI_Parser.parse_columns(lines)["81"]
+    assert column.values[0] == GSI_Parser.parse(lines[0])[0]["targetX"] == 100.0
+    assert column.values[1] == 1.0
+    assert column.valid.tolist() == [True, True, False]
+    assert GSI_Parser.parse_columns(lines[:1])["81"].values[0] == 100.0
+
+
+def test_parse_columns_non_ascii_text():
+    lines = ["*11....+000000000000P�1 81..00+0000000000001000 "]
+    columns = GSI_Parser.parse_columns(lines)
+    assert columns["11"].values[0] == b"000000000000P?1"
+    assert columns["11"].valid[0]
+    assert columns["81"].values[0] == 1.0
+
+
+def test_iter_file_skips_lines_without_block(tmp_path):
+    job = tmp_path / "job.gsi"
+    job.write_bytes(b"?\r\n*81..00+0000000000001000 \r\n?\r\n*88..10+0000000000001550 \r\n")
+    blocks = list(GSI_Parser.iter_file(job, as_blocks=True))
+    assert len(blocks) == 2 and all(isinstance(block, GSI_Parser.GSIBlock) for block in blocks)
+    [batch] = GSI_Parser.iter_file(job, batch_size=10, as_blocks=True)
+    assert [block.to_dicts() for block in batch] == [block.to_dicts() for block in blocks]
+    assert len(list(GSI_Parser.iter_file(job))) == 4
+
+
+def test_iter_lines_matches_split_for_any_chunk_size():
+    data = b"*11....+0000000000000001 \r\n\r\n*81..00+0000000000001000 \r\n?\n*88..10+0000000000001550 "
+    expected = [line.decode() for line in data.split(b"\n") if line.strip()]
+    for chunk_size in (1, 3, 7, 1 << 20):
+        assert list(GSI_Parser.iter_lines(io.BytesIO(data), chunk_size)) == expected
+
+
+def test_iter_lines_caps_lines_without_line_feed():
+    data = b"*81..00+0000000000001000 \r" * 1000
+    lines = list(GSI_Parser.iter_lines(io.BytesIO(data), chunk_size=100, max_line_size=1000))
+    assert all(len(line) <= 1100 for line in lines)
+    assert "".join(lines).encode() == data
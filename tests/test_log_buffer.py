@@ -0,0 +1,43 @@
+import logging
+
+from PyQt5.QtCore import QCoreApplication, QEvent
+from PyQt5.QtWidgets import QPlainTextEdit
+
+from tachyconnect.LogBuffer import LogBuffer
+
+
+def make_logger(log_buffer):
+    logger = logging.getLogger("tests.log_buffer")
+    logger.handlers = [log_buffer]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    return logger
+
+
+def test_batches_into_viewer():
+    viewer = QPlainTextEdit()
+    log_buffer = LogBuffer(capacity=100, max_blocks=50)
+    logger = make_logger(log_buffer)
+    log_buffer.attach(viewer)
+    for i in range(200):
+        logger.info("line %d", i)
+    logger.debug("hidden")
+    assert viewer.toPlainText() == ""
+    log_buffer._append_to_viewer()
+    lines = viewer.toPlainText().splitlines()
+    assert len(lines) == 50 and lines[-1].endswith("line 199")
+    assert len(log_buffer.lines()) == 100
+    log_buffer.close()
+
+
+def test_flush_does_not_touch_deleted_viewer():
+    viewer = QPlainTextEdit()
+    log_buffer = LogBuffer()
+    logger = make_logger(log_buffer)
+    log_buffer.attach(viewer)
+    logger.info("pending")
+    viewer.deleteLater()
+    viewer = None
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    log_buffer.flush()
+    log_buffer.close()
@@ -0,0 +1,127 @@
+import pytest
+
+from tachyconnect.ts_control import TimerWheel, TransactionIds, MessageQueue, GeoCOMCommand, GeoCOMReply, PendingReply
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingSerial:
+    def __init__(self):
+        self.written = []
+
+    def write(self, data):
+        self.written.append(bytes(data))
+        return len(data)
+
+    def close(self):
+        pass
+
+
+def expired_at(wheel, clock, until, step=0.01):
+    """Advances clock in steps and returns {key: time it expired}."""
+    expired = {}
+    while clock.now < until:
+        clock.now = round(clock.now + step, 6)
+        for key in wheel.advance():
+            expired[key] = clock.now
+    return expired
+
+
+def test_timer_wheel_fires_on_the_tick_of_the_deadline():
+    clock = FakeClock()
+    wheel = TimerWheel(0.05, clock=clock)
+    wheel.schedule("a", 1.0)
+    wheel.schedule("b", 0.01)
+    wheel.schedule("c", 20.0)  # more than one round of 256 ticks
+    expired = expired_at(wheel, clock, 121)
+    assert expired["a"] == pytest.approx(101.0)
+    assert expired["b"] == pytest.approx(100.05)
+    assert expired["c"] == pytest.approx(120.0)
+    assert len(wheel) == 0
+
+
+def test_timer_wheel_never_fires_early_while_running():
+    clock = FakeClock()
+    wheel = TimerWheel(0.05, clock=clock)
+    wheel.schedule("running", 10)
+    expired_at(wheel, clock, 100.04)  # 0.04 s into the first tick
+    wheel.schedule("late", 1.0)
+    expired = expired_at(wheel, clock, 102)
+    assert 101.04 <= expired["late"] <= 101.04 + 0.05 + 1e-9
+
+
+def test_timer_wheel_cancel():
+    clock = FakeClock()
+    wheel = TimerWheel(0.05, clock=clock)
+    wheel.schedule("a", 0.1)
+    wheel.cancel("a")
+    assert expired_at(wheel, clock, 101) == {}
+
+
+def make_queue(retries=0, backoff=2.0):
+    clock = FakeClock()
+    queue = MessageQueue(7, retries=retries, backoff=backoff)
+    queue.deadlines = TimerWheel(MessageQueue.TICK / 1000, clock=clock)
+    serial = RecordingSerial()
+    queue.set_serial(serial)
+    return queue, serial, clock
+
+
+def run_queue(queue, clock, until):
+    while clock.now < until:
+        clock.now = round(clock.now + 0.01, 6)
+        queue.expire()
+
+
+def test_retries_with_backoff_then_timed_out():
+    queue, serial, clock = make_queue(retries=2, backoff=2.0)
+    timed_out = []
+    queue.timed_out.connect(timed_out.append)
+    command = GeoCOMCommand("0", "COM_NullProc")
+    command.timeout = 1
+    pending_reply = PendingReply(command)
+    queue.append(command, pending_reply)
+    run_queue(queue, clock, 100.99)
+    assert len(serial.written) == 1
+    run_queue(queue, clock, 101.01)
+    assert len(serial.written) == 2  # first retry after 1 s
+    run_queue(queue, clock, 102.99)
+    assert len(serial.written) == 2
+    run_queue(queue, clock, 103.01)
+    assert len(serial.written) == 3  # second retry 2 s later
+    run_queue(queue, clock, 106.99)
+    assert timed_out == [] and not pending_reply.done()
+    run_queue(queue, clock, 107.01)  # gives up 4 s later
+    assert timed_out == [command]
+    assert isinstance(pending_reply.error, TimeoutError)
+    assert queue.in_flight() == 0 and len(queue.ids) == 7
+
+
+def test_reply_cancels_deadline():
+    queue, serial, clock = make_queue()
+    timed_out = []
+    queue.timed_out.connect(timed_out.append)
+    command = GeoCOMCommand("0", "COM_NullProc")
+    transaction_id = queue.append(command)
+    request, reply = queue.register_reply(GeoCOMReply(f"%R1P,0,{transaction_id}:0".encode('ascii')))
+    assert request["command"] is command
+    run_queue(queue, clock, 105)
+    assert timed_out == [] and len(serial.written) == 1
+
+
+def test_transaction_ids_reuse_released_ids_last():
+    ids = TransactionIds(3)
+    assert [ids.acquire(), ids.acquire(), ids.acquire()] == [1, 2, 3]
+    assert ids.acquire() is False
+    assert ids.release(2) and not ids.release(2)
+    assert 2 not in ids and 1 in ids
+    assert ids.release(1)
+    assert [ids.acquire(), ids.acquire()] == [2, 1]
+    assert not ids.release(0) and not ids.release(4)
+    assert len(ids) == 0
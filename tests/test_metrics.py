@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from tachyconnect.Metrics import LatencyHistogram, Metrics
+from tachyconnect.ts_control import MessageQueue, GeoCOMCommand, GeoCOMReply
+
+from test_message_queue import RecordingSerial
+
+
+def test_bucket_ranges_are_contiguous():
+    histogram = LatencyHistogram()
+    next_value = 0
+    for index in range(3000):
+        lowest, width = histogram.bucket_range(index)
+        assert lowest == next_value
+        assert histogram.index(lowest) == index == histogram.index(lowest + width - 1)
+        next_value = lowest + width
+
+
+def test_relative_error_below_one_percent():
+    histogram = LatencyHistogram()
+    for value in (1, 255, 256, 1000, 123456, 3600 * 1000000):
+        lowest, width = histogram.bucket_range(histogram.index(value))
+        assert lowest <= value < lowest + width
+        assert width == 1 or width / lowest < 0.01
+
+
+def test_percentiles():
+    random.seed(3)
+    values = sorted(random.expovariate(100) for _ in range(20000))
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+    for percent in (50, 90, 99, 99.9):
+        exact = values[int(len(values) * percent / 100) - 1]
+        assert histogram.percentile(percent) == pytest.approx(exact, rel=0.01, abs=2e-6)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 20000
+    assert snapshot["min"] == pytest.approx(values[0], abs=1e-6)
+    assert snapshot["max"] == pytest.approx(values[-1], abs=1e-6)
+    assert LatencyHistogram().snapshot()["p50"] is None
+
+
+def test_queue_records_round_trips_and_unsolicited():
+    clock = iter([0.0, 1.0, 1.0, 1.25]).__next__
+    metrics = Metrics(clock=clock)
+    queue = MessageQueue(7)
+    queue.metrics = metrics
+    queue.set_serial(RecordingSerial())
+    transaction_id = queue.append(GeoCOMCommand("0", "COM_NullProc"))
+    queue.register_reply(GeoCOMReply(f"%R1P,0,{transaction_id}:0".encode('ascii')))
+    queue.register_reply(GeoCOMReply(b"%R1P,0,6:0"))
+    requests = metrics.requests["COM_NullProc"]
+    assert requests["sent"] == requests["replies"] == 1
+    assert requests["round_trip"].snapshot()["max"] == 0.25
+    assert metrics.unsolicited == 1
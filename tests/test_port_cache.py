@@ -0,0 +1,25 @@
+from PyQt5.QtSerialPort import QSerialPortInfo
+
+from tachyconnect.PortCache import PortCache
+from tachyconnect.ts_control import CommunicationConstants
+
+
+def test_remember_survives_reload(tmp_path):
+    path = str(tmp_path / "ports.json")
+    port_info = QSerialPortInfo()
+    cache = PortCache(path)
+    cache.remember(port_info, 115200, CommunicationConstants.ImplementationStates.GEOCOM, "TS16", "ttyTachy0")
+    assert list(cache.entries) == ["port:ttyTachy0"]
+    entry = PortCache(path).entries["port:ttyTachy0"]
+    assert entry["port_name"] == "ttyTachy0"
+    assert entry["baud_rate"] == 115200
+    assert entry["protocol"] == "GEOCOM"
+    assert entry["instrument_name"] == "TS16"
+    cache.clear()
+    assert PortCache(path).entries == {}
+
+
+def test_unreadable_cache_is_empty(tmp_path):
+    path = tmp_path / "ports.json"
+    path.write_text("not json")
+    assert PortCache(str(path)).entries == {}
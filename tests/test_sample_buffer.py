@@ -0,0 +1,42 @@
+import pytest
+
+from tachyconnect.SampleBuffer import SampleBuffer
+from tachyconnect.TachyRequest import TMC_QuickDist, TMC_GetHeight
+from tachyconnect.ts_control import GeoCOMReply
+
+np = pytest.importorskip("numpy")
+
+
+def test_range_over_wrapped_ring():
+    buffer = SampleBuffer(["x"], capacity=4)
+    for t in range(6):
+        buffer.append(float(t), [t * 10])
+    assert len(buffer) == 4
+    times, values = buffer.range()
+    assert times.tolist() == [2, 3, 4, 5]
+    assert values[:, 0].tolist() == [20, 30, 40, 50]
+    times, values = buffer.range(3, 5)
+    assert times.tolist() == [3, 4]
+    times, values = buffer.range(3.5)
+    assert times.tolist() == [4, 5]
+    assert buffer.range(10)[0].tolist() == []
+    assert buffer.latest()[0] == 5
+
+
+def test_range_before_wrap_and_clear():
+    buffer = SampleBuffer(["x"], capacity=4)
+    buffer.append(1.0, [1])
+    buffer.append(2.0, [2])
+    assert buffer.range(None, 2)[0].tolist() == [1]
+    buffer.clear()
+    assert len(buffer) == 0 and buffer.latest() is None
+
+
+def test_feed_decodes_request_class():
+    buffer = SampleBuffer.for_request(TMC_QuickDist, capacity=8)
+    assert buffer.fields == ["rc", "hz", "v", "slope_distance"]
+    buffer.feed(GeoCOMReply(b"%R1P,0,1:0,1.5,1.25,12.5"), time=1.0)
+    buffer.feed(GeoCOMReply(b"%R1P,0,1:1285"), time=2.0)
+    times, distances = buffer.column("slope_distance")
+    assert distances[0] == 12.5 and np.isnan(distances[1])
+    assert SampleBuffer.for_request(TMC_GetHeight).fields == ["rc", "height"]
@@ -0,0 +1,33 @@
+from tachyconnect import gc_constants as gc
+from tachyconnect.ts_control import Dispatcher, MessageQueue, GeoCOMReply
+from tachyconnect.ReplyHandler import ReplyHandler
+from tachyconnect.TachyJoystick import TachyJoystick
+from tachyconnect.TachyRequest import TMC_GetHeight, TMC_QuickDist, AUS_GetUserLockState, COM_NullProc
+
+
+def test_decode_typed_record():
+    record = TMC_QuickDist.decode(GeoCOMReply(b"%R1P,0,3:0,1.25,1.5,12.345"))
+    assert record == (0, 1.25, 1.5, 12.345)
+    assert record.slope_distance == 12.345 and isinstance(record.rc, int)
+
+
+def test_decode_error_reply():
+    record = TMC_GetHeight.decode(GeoCOMReply(b"%R1P,0,1:1283"))
+    assert record.rc == 1283
+    assert record.height is None
+
+
+def test_decode_enumeration_and_raw_values():
+    assert AUS_GetUserLockState.decode(GeoCOMReply(b"%R1P,0,2:0,1")).state == gc.ON_OFF_TYPE.ON
+    assert TMC_GetHeight.decode(GeoCOMReply(b"%R1P,0,1:0,abc")).height == "abc"
+    assert COM_NullProc.decode(GeoCOMReply(b"%R1P,0,1:0,x")) == (0, "x")
+
+
+def test_joystick_shows_error_reply():
+    joystick = TachyJoystick(Dispatcher(MessageQueue(1), MessageQueue(7), ReplyHandler()))
+    received = []
+    joystick.ref_z_received.connect(received.append)
+    joystick.show_ref_height(*TMC_GetHeight.decode(GeoCOMReply(b"%R1P,0,1:1283")))
+    assert joystick.refHeight.text() == "n/a" and received == []
+    joystick.show_ref_height(*TMC_GetHeight.decode(GeoCOMReply(b"%R1P,0,1:0,1.55")))
+    assert joystick.refHeight.text() == "1.550" and received == ["1.550"]